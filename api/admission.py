@@ -0,0 +1,125 @@
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from api.metrics import metrics
+
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "8"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "16"))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "10"))
+ADMISSION_PRIORITY_SLOTS = int(os.getenv("ADMISSION_PRIORITY_SLOTS", "32"))
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed; carries the HTTP status and ``Retry-After`` seconds."""
+
+    def __init__(self, status_code, retry_after, reason):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionController:
+    """Caps concurrent recommendations and bounds how long others may wait.
+
+    Up to ``max_in_flight`` requests run at once and up to ``max_queue`` more
+    wait, each for at most ``max_wait`` seconds. Requests beyond the queue are
+    rejected with 429 immediately; requests that time out in the queue get
+    503. Cheap requests (e.g. cache hits) use a separate priority lane with
+    its own limit so they never queue behind expensive ones.
+    """
+
+    def __init__(
+        self,
+        max_in_flight=ADMISSION_MAX_IN_FLIGHT,
+        max_queue=ADMISSION_MAX_QUEUE,
+        max_wait=ADMISSION_MAX_WAIT,
+        priority_slots=ADMISSION_PRIORITY_SLOTS,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.priority_slots = priority_slots
+        self._cond = threading.Condition()
+        self.in_flight = 0
+        self.queued = 0
+        self.priority_in_flight = 0
+        # Moving average of service time, used to size Retry-After.
+        self._service_time = 5.0
+
+    def _retry_after(self):
+        backlog = (self.queued + self.in_flight) / max(1, self.max_in_flight)
+        return max(1, math.ceil(backlog * self._service_time))
+
+    def _publish(self):
+        metrics.set_gauge("admission_in_flight", self.in_flight)
+        metrics.set_gauge("admission_queue_depth", self.queued)
+        metrics.set_gauge("admission_priority_in_flight", self.priority_in_flight)
+
+    def _shed(self, status_code, reason):
+        metrics.increment("admission_shed_total")
+        metrics.increment(f"admission_shed_{reason}_total")
+        raise Overloaded(status_code, self._retry_after(), reason)
+
+    def acquire(self, priority=False):
+        """Block until admitted; returns the lane name to pass to ``release``."""
+        with self._cond:
+            if priority:
+                if self.priority_in_flight >= self.priority_slots:
+                    self._shed(429, "priority_full")
+                self.priority_in_flight += 1
+                lane = "priority"
+            elif self.in_flight < self.max_in_flight and self.queued == 0:
+                self.in_flight += 1
+                lane = "normal"
+            elif self.queued >= self.max_queue:
+                self._shed(429, "queue_full")
+            else:
+                self.queued += 1
+                self._publish()
+                enqueued = time.monotonic()
+                deadline = enqueued + self.max_wait
+                try:
+                    while self.in_flight >= self.max_in_flight:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._shed(503, "queue_timeout")
+                        self._cond.wait(remaining)
+                finally:
+                    self.queued -= 1
+                    self._publish()
+                self.in_flight += 1
+                metrics.observe("admission_queue_wait_seconds", time.monotonic() - enqueued)
+                lane = "normal"
+
+            metrics.increment("admission_admitted_total")
+            self._publish()
+            return lane
+
+    def release(self, lane, service_time=None):
+        with self._cond:
+            if lane == "priority":
+                self.priority_in_flight -= 1
+            else:
+                self.in_flight -= 1
+                if service_time is not None:
+                    self._service_time = 0.8 * self._service_time + 0.2 * service_time
+                # Wake every waiter: one chosen by notify() may already have
+                # timed out, which would leave the freed slot idle.
+                self._cond.notify_all()
+            self._publish()
+
+    @contextmanager
+    def admit(self, priority=False):
+        lane = self.acquire(priority)
+        start = time.monotonic()
+        try:
+            yield lane
+        finally:
+            self.release(lane, time.monotonic() - start)
+
+
+admission = AdmissionController()
@@ -1,23 +1,70 @@
-import uvicorn
-from fastapi import FastAPI, Request, HTTPException
+import asyncio
+from contextlib import asynccontextmanager, nullcontext
+from fastapi import FastAPI, Request, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
 import logging
+import os
 import time
 import json
 from api.gemini_integeration import parse_query_with_gemini
 from api.gemini_recommender import get_top_assessments_with_gemini
-from api.shl_scraper import fetch_assessments, save_assessments
+from api.shl_scraper import fetch_assessments
+from api.catalog import get_snapshot, resolve_assessments
+from api.catalog_refresher import run_refresher
+from api.warmup import warm_up
+from api.cache_warming import CACHE_WARMING, coverage_report, warm_caches
+from api.profiling import profile_request
+from api.encoding import json_response
+from api.admission import ADMISSION_MAX_WAIT, Overloaded, admission
+from api.metrics import metrics
+from api.response_cache import recommendation_cache, recommendation_key
+from api.jd_compress import prepare_query
+from api.search_planner import search_hits
+from api.shared_cache import write_file_atomic
+from api.speculation import SPECULATIVE_RANKING, rank_speculatively
+from api.traffic_capture import capture_request
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger(__name__)
 
+# Longest a pipeline run (parse, searches, details, ranking) is expected to take.
+# The fill lock outlives it so a slow run is never duplicated by a second worker.
+PIPELINE_TIMEOUT = float(os.getenv("PIPELINE_TIMEOUT", "300"))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    app.state.warmup = {}
+
+    async def warm():
+        app.state.warmup = await asyncio.to_thread(warm_up)
+        app.state.ready = True
+        # Searches are warmed after readiness; live requests don't wait for them.
+        if CACHE_WARMING:
+            try:
+                await asyncio.to_thread(warm_caches)
+            except Exception as e:
+                logger.error(f"Cache warming failed: {str(e)}")
+
+    tasks = [asyncio.create_task(warm()), asyncio.create_task(run_refresher())]
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
 app = FastAPI(
     title="SHL Assessment Recommender API",
     description="API for recommending SHL assessments based on job descriptions",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -29,63 +76,230 @@ app.add_middleware(
 )
 
 
+RecommendationField = Literal[
+    "url", "adaptive_support", "description", "duration", "remote_support", "test_type"
+]
+
+
 class QueryRequest(BaseModel):
     query: str
+    k: int = Field(10, ge=1, le=50)
+    fields: Optional[List[RecommendationField]] = Field(None, min_length=1)
 
 
 class HealthResponse(BaseModel):
     status: str
     version: str
+    catalog_version: str
+
+
+class ReadyResponse(BaseModel):
+    status: str
+    warmup: Dict[str, Optional[float]]
 
 
 @app.get("/health", response_model=HealthResponse)
 def health():
-    return {"status": "ok", "version": "1.0.0"}
+    return {
+        "status": "ok",
+        "version": "1.0.0",
+        "catalog_version": get_snapshot().version,
+    }
 
 
-@app.post("/recommend")
-def recommend(query: QueryRequest):
-    try:
-        start_time = time.time()
+@app.get("/ready", response_model=ReadyResponse)
+def ready(request: Request, response: Response):
+    if not request.app.state.ready:
+        response.status_code = 503
+        return {"status": "warming_up", "warmup": {}}
+    return {"status": "ready", "warmup": request.app.state.warmup}
 
-        if not query.query or len(query.query.strip()) < 10:
-            raise HTTPException(status_code=400)
 
-        filters = parse_query_with_gemini(query.query)
+NO_FILTERS_RESPONSE = {
+    "filters": {},
+    "recommendations": [],
+    "message": "Could not extract search criteria from job description",
+}
+
+
+def iter_recommendation(query_text, k=10, fields=None):
+    """Run the recommendation pipeline, yielding ``(stage, payload)`` as each stage finishes.
+
+    The last event is ``("recommendations", response_body)``.
+    """
+    metrics.increment("recommendations_computed_total")
+    query_text = prepare_query(query_text)
+
+    filters = parse_query_with_gemini(query_text)
 
-        if not filters:
-            logger.warning("No filters were extracted from the job description")
-            return {
-                "filters": {},
-                "recommendations": [],
-                "message": "Could not extract search criteria from job description",
-            }
+    if not filters:
+        logger.warning("No filters were extracted from the job description")
+        yield "recommendations", NO_FILTERS_RESPONSE
+        return
 
+    yield "filters", filters.to_dict()
+
+    snapshot = get_snapshot()
+
+    speculation = None
+    if SPECULATIVE_RANKING:
+        speculation = rank_speculatively(query_text, filters, snapshot, k, fields)
+
+    if speculation is not None:
+        results, candidate_count = speculation
+        yield "candidates", {"count": candidate_count}
+    else:
         raw_results = fetch_assessments(filters)
 
-        recommendations = save_assessments(raw_results)
+        candidates = resolve_assessments(raw_results, snapshot)
+
+        if not candidates:
+            logger.warning("Search returned no assessments; using local catalog facets")
+            candidates = snapshot.filter(filters)
+
+        yield "candidates", {"count": len(candidates)}
+
+        results = get_top_assessments_with_gemini(
+            query_text,
+            k=k,
+            assessments=candidates,
+            fields=fields,
+            search_hits=search_hits(raw_results),
+        )
+
+    write_file_atomic(
+        "recommendationsResponse.txt",
+        json.dumps(
+            {
+                "recommendations": results,
+            },
+            indent=2,
+        ),
+    )
 
-        results = get_top_assessments_with_gemini(query.query, k=10)
+    yield "recommendations", {"recommendations": results}
 
-        with open("recommendationsResponse.txt", "w", encoding="utf-8") as file:
-            json.dump(
-                {
-                    "recommendations": results,
-                },
-                file,
-                indent=2,
-            )
+
+def run_recommendation(query, headers, request=None):
+    """Serve ``query`` from the response cache or run the pipeline under admission control."""
+    cache_key = recommendation_key(query.query, query.k, query.fields, get_snapshot().version)
+
+    cached = recommendation_cache.get(cache_key)
+    if cached is not None:
+        with admission.admit(priority=True):
+            metrics.increment("recommend_cache_hits_total")
+            yield "recommendations", cached
+        return
+
+    # Admission comes first so duplicates queue within its bounds; once admitted,
+    # a request whose twin is already running waits for that result, but no
+    # longer than it could have waited in the queue.
+    with admission.admit(), recommendation_cache.filling(
+        cache_key, wait=ADMISSION_MAX_WAIT, lock_ttl=PIPELINE_TIMEOUT
+    ) as cached:
+        if cached is not None:
+            metrics.increment("recommend_cache_hits_total")
+            yield "recommendations", cached
+            return
+
+        with profile_request(request, headers) if request is not None else nullcontext(), capture_request(
+            query.query, query.k, query.fields
+        ) as recording:
+            stages = iter_recommendation(query.query, query.k, query.fields)
+            if recording is not None:
+                stages = recording.record(stages)
+            for stage, payload in stages:
+                yield stage, payload
+
+        if payload is not NO_FILTERS_RESPONSE:
+            recommendation_cache.set(cache_key, payload)
+
+
+def overloaded_body(e):
+    return {"detail": "Service overloaded, retry later", "reason": e.reason, "retry_after": e.retry_after}
+
+
+@app.post("/recommend")
+def recommend(query: QueryRequest, request: Request):
+    try:
+        start_time = time.time()
+
+        if not query.query or len(query.query.strip()) < 10:
+            raise HTTPException(status_code=400)
+
+        headers = {}
+        for stage, payload in run_recommendation(query, headers, request):
+            pass
 
         processing_time = time.time() - start_time
+        metrics.observe("recommend_latency_seconds", processing_time)
+
+        return json_response(payload, request, headers=headers)
+
+    except Overloaded as e:
+        logger.warning(f"Shedding recommendation request: {e.reason}")
+        return json_response(
+            overloaded_body(e),
+            request,
+            status_code=e.status_code,
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
-        return {
-            "recommendations": results,
-        }
+    except HTTPException:
+        raise
 
     except Exception as e:
         logger.error(f"Error processing recommendation: {str(e)}")
         raise HTTPException(status_code=500)
 
 
+@app.post("/recommend/stream")
+def recommend_stream(query: QueryRequest):
+    """Same pipeline as ``/recommend``, streamed as newline-delimited JSON events."""
+    if not query.query or len(query.query.strip()) < 10:
+        raise HTTPException(status_code=400)
+
+    def events():
+        try:
+            for stage, payload in run_recommendation(query, {}):
+                yield json.dumps({"stage": stage, "data": payload}) + "\n"
+        except Overloaded as e:
+            logger.warning(f"Shedding recommendation request: {e.reason}")
+            yield json.dumps({"stage": "error", "data": overloaded_body(e)}) + "\n"
+        except Exception as e:
+            logger.error(f"Error processing recommendation: {str(e)}")
+            yield json.dumps({"stage": "error", "data": {"detail": "Internal Server Error"}}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@app.get("/warming")
+def warming():
+    """Warm-cache coverage of recorded search traffic and the most requested combinations."""
+    return coverage_report()
+
+
+@app.get("/metrics")
+def get_metrics():
+    snapshot = metrics.snapshot()
+    counters = snapshot["counters"]
+    shed = counters.get("admission_shed_total", 0)
+    admitted = counters.get("admission_admitted_total", 0)
+    attempts = counters.get("speculation_attempts_total", 0)
+    computed = counters.get("recommendations_computed_total", 0)
+    snapshot["derived"] = {
+        "shed_rate": shed / (shed + admitted) if shed + admitted else 0.0,
+        "speculation_win_rate": (
+            counters.get("speculation_wins_total", 0) / attempts if attempts else 0.0
+        ),
+        "outbound_requests_per_recommendation": (
+            counters.get("outbound_requests_total", 0) / computed if computed else 0.0
+        ),
+    }
+    return snapshot
+
+
 if __name__ == "_main_":
+    import uvicorn
+
     uvicorn.run("api.app:app", host="0.0.0.0", port=8000)
@@ -0,0 +1,178 @@
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from api.metrics import metrics
+from api.response_cache import pages_cache
+from api.shared_cache import shared_cache
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+CACHE_WARMING = os.getenv("CACHE_WARMING", "1") == "1"
+WARM_TOP_N = int(os.getenv("WARM_TOP_N", "20"))
+WARM_CONCURRENCY = int(os.getenv("WARM_CONCURRENCY", "2"))
+# Traffic not seen again within this window drops out of the distribution.
+TRAFFIC_WINDOW = int(os.getenv("TRAFFIC_WINDOW", str(7 * 86400)))
+# Searches warmed before any traffic has been recorded, as "family/level/keyword, keyword;...".
+WARM_SEED = os.getenv(
+    "WARM_SEED",
+    "Sales/Entry-Level/sales, communication;"
+    "Information Technology/Mid-Professional/java, sql, python;"
+    "Contact Center/Entry-Level/customer service",
+)
+
+# Filters that make up a combination; keywords vary too much per query to count.
+COMBINATION_FILTERS = ("job_family", "job_level")
+
+combination_traffic = shared_cache.namespace("traffic_combinations", TRAFFIC_WINDOW)
+url_traffic = shared_cache.namespace("traffic_urls", TRAFFIC_WINDOW)
+warming_state = shared_cache.namespace("cache_warming", TRAFFIC_WINDOW)
+
+
+def combination_of(filters):
+    return {name: getattr(filters, name) for name in COMBINATION_FILTERS}
+
+
+def _bump(namespace, key, entry):
+    # Read-modify-write across workers can lose an increment under contention,
+    # which is fine for a popularity ranking.
+    current = namespace.get(key) or {**entry, "count": 0}
+    current["count"] += 1
+    namespace.set(key, current)
+
+
+def _warmed_urls():
+    state = warming_state.get("warmed")
+    return set(state["urls"]) if state else set()
+
+
+def record_traffic(filters, urls):
+    """Count a live search: its filter combination and the search URLs it issued."""
+    combination = combination_of(filters)
+    if any(combination.values()):
+        _bump(combination_traffic, json.dumps(combination, sort_keys=True), {"filters": combination})
+    for url in urls:
+        _bump(url_traffic, url, {"url": url, "filters": combination})
+
+    metrics.increment("warming_searches_total")
+    warmed = _warmed_urls()
+    if urls and all(url in warmed for url in urls):
+        metrics.increment("warming_searches_covered_total")
+
+
+def _top(namespace, n):
+    entries = [value for _, value in namespace.items()]
+    return sorted(entries, key=lambda entry: -entry["count"])[:n]
+
+
+def seed_searches():
+    """``{"url", "filters"}`` entries for the ``WARM_SEED`` searches, built as live requests build them."""
+    from api.models import Filters
+    from api.shl_scraper import build_single_search_url
+
+    searches = []
+    for item in WARM_SEED.split(";"):
+        family, level, keywords = (item.split("/", 2) + ["", ""])[:3]
+        filters = Filters.from_dict(
+            {"job_family": family, "job_level": level, "keywords": keywords}
+        )
+        if not filters.keywords:
+            continue
+        for keyword in filters.keywords:
+            searches.append(
+                {"url": build_single_search_url(filters, keyword), "filters": combination_of(filters)}
+            )
+    return searches
+
+
+def warm_caches(top_n=WARM_TOP_N, concurrency=WARM_CONCURRENCY, force=False):
+    """Pre-fetch the ``top_n`` most requested search URLs.
+
+    These are the exact URLs live requests issued, keywords included, so a
+    warmed page is one the next such request finds in the cache; before any
+    traffic is recorded the ``WARM_SEED`` searches are used instead. Each
+    search page is stored in the shared pages cache and the assessments it
+    lists are resolved, so detail pages missing from the catalog snapshot are
+    cached too. ``force`` re-fetches pages that are already cached, which is
+    what a catalog refresh wants. Runs at most ``concurrency`` fetches at once
+    so warming never competes hard with live traffic. Its fetches are counted
+    in ``warming_requests_total``, not ``outbound_requests_total``.
+    """
+    from api.catalog import get_snapshot, resolve_assessments
+    from api.shl_scraper import _fetch_listing, warming_requests
+
+    start = time.perf_counter()
+    searches = _top(url_traffic, top_n) or seed_searches()[:top_n]
+    urls = list(dict.fromkeys(entry["url"] for entry in searches))
+    combinations = list(
+        {
+            json.dumps(entry["filters"], sort_keys=True): entry["filters"]
+            for entry in searches
+            if entry.get("filters")
+        }.values()
+    )
+    snapshot = get_snapshot()
+
+    def warm(url):
+        try:
+            with warming_requests():
+                if force:
+                    rows = _fetch_listing(url)
+                    if rows:
+                        pages_cache.set(url, rows)
+                else:
+                    rows = pages_cache.get_or_set(url, lambda: _fetch_listing(url))
+                resolve_assessments(rows or [], snapshot)
+            return bool(rows)
+        except Exception as e:
+            logger.warning(f"Failed to warm {url}: {str(e)}")
+            return False
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="warm") as pool:
+        warmed = [url for url, ok in zip(urls, pool.map(warm, urls)) if ok]
+
+    elapsed = time.perf_counter() - start
+    warming_state.set(
+        "warmed",
+        {"urls": warmed, "combinations": combinations, "finished_at": time.time(), "seconds": elapsed},
+    )
+    metrics.observe("warming_seconds", elapsed)
+    logger.info(f"Warmed {len(warmed)}/{len(urls)} searches in {elapsed:.1f}s")
+    return warmed
+
+
+def coverage_report(top_n=WARM_TOP_N):
+    """How much of the recorded traffic the last warming run covered."""
+    state = warming_state.get("warmed") or {}
+    warmed = set(state.get("urls", []))
+    warmed_combinations = {json.dumps(c, sort_keys=True) for c in state.get("combinations", [])}
+
+    urls = [value for _, value in url_traffic.items()]
+    total = sum(entry["count"] for entry in urls)
+    covered = sum(entry["count"] for entry in urls if entry["url"] in warmed)
+    searches = metrics.counter("warming_searches_total")
+
+    return {
+        "last_run": {
+            "finished_at": state.get("finished_at"),
+            "seconds": state.get("seconds"),
+            "searches": len(warmed),
+        },
+        "recorded_searches": total,
+        "recorded_coverage": covered / total if total else 0.0,
+        "live_coverage": (
+            metrics.counter("warming_searches_covered_total") / searches if searches else 0.0
+        ),
+        "top_combinations": [
+            {
+                **entry,
+                "warmed": json.dumps(entry["filters"], sort_keys=True) in warmed_combinations,
+            }
+            for entry in _top(combination_traffic, top_n)
+        ],
+    }
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from types import MappingProxyType
+
+from api.columnar import ColumnarCatalog, load_catalog, write_columnar
+from api.facets import FacetIndex, filter_records
+from api.shl_scraper import get_assessment_details
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+CATALOG_PATH = os.getenv("CATALOG_PATH", "assessments_data.json")
+CATALOG_COLUMNAR_PATH = os.getenv(
+    "CATALOG_COLUMNAR_PATH", os.path.splitext(CATALOG_PATH)[0] + ".cat"
+)
+# ETag and content hash per detail page, so a restarted or sibling worker can
+# re-crawl incrementally from the saved catalog.
+CATALOG_VALIDATORS_PATH = os.getenv(
+    "CATALOG_VALIDATORS_PATH", os.path.splitext(CATALOG_PATH)[0] + ".validators.json"
+)
+
+
+class CatalogSnapshot:
+    """Immutable view of the assessment catalog.
+
+    Records are keyed by detail URL and must be treated as read-only: a new
+    snapshot is built for every refresh and swapped in as a whole, so a request
+    that grabbed a snapshot keeps a consistent view until it finishes.
+    ``records`` is either a tuple of dicts or a memory-mapped ``ColumnarCatalog``
+    that decodes records on access.
+    """
+
+    __slots__ = ("records", "by_url", "validators", "version", "created_at", "_facets")
+
+    def __init__(self, records, validators=None, version=None):
+        if isinstance(records, ColumnarCatalog):
+            self.records = records
+            urls = (records.url(i) for i in range(len(records)))
+        else:
+            self.records = tuple(records)
+            urls = (r["url"] for r in self.records)
+        self.by_url = MappingProxyType({url: i for i, url in enumerate(urls)})
+        # url -> {"etag": ..., "hash": ...} used for conditional re-fetches.
+        self.validators = MappingProxyType(dict(validators or {}))
+        self.version = version or compute_version(self.records)
+        self.created_at = time.time()
+        self._facets = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, url):
+        i = self.by_url.get(url)
+        return None if i is None else self.records[i]
+
+    @property
+    def facets(self):
+        """Facet index over this snapshot, built on first use and dropped with it."""
+        if self._facets is None:
+            self._facets = FacetIndex(self.records)
+        return self._facets
+
+    def filter(self, filters):
+        """Records matching parsed query filters, resolved locally without the network."""
+        return filter_records(self.records, self.facets, filters)
+
+
+def compute_version(records):
+    """Content hash of the records, identical across processes for the same catalog."""
+    payload = json.dumps(
+        sorted(records, key=lambda r: r["url"]), sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+
+class CatalogStore:
+    """Holds the current snapshot and swaps in new ones atomically.
+
+    Readers call ``current()`` once per request and keep the returned object;
+    the swap is a single reference assignment so they never see a half-built
+    catalog. Listeners registered with ``subscribe`` run after every swap that
+    changes the catalog version and are where dependent caches drop their
+    entries.
+    """
+
+    def __init__(self, snapshot=None, loader=None):
+        self._snapshot = snapshot
+        self._loader = loader or (lambda: CatalogSnapshot([]))
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def current(self):
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot = self._loader()
+                snapshot = self._snapshot
+        return snapshot
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+        return listener
+
+    def swap(self, snapshot):
+        self.current()
+        with self._lock:
+            previous = self._snapshot
+            self._snapshot = snapshot
+
+        if snapshot.version == previous.version:
+            return previous
+
+        logger.info(
+            f"Catalog snapshot swapped {previous.version} -> {snapshot.version} "
+            f"({len(snapshot)} assessments)"
+        )
+        for listener in list(self._listeners):
+            try:
+                listener(snapshot, previous)
+            except Exception as e:
+                logger.error(f"Catalog swap listener failed: {str(e)}")
+        return previous
+
+
+def load_validators(version, path=CATALOG_VALIDATORS_PATH):
+    """Validators saved with catalog ``version``; empty when missing or saved for another one."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            saved = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    # Validators for another version could vouch for records this one doesn't have.
+    return saved.get("validators", {}) if saved.get("version") == version else {}
+
+
+def save_validators(snapshot, path=CATALOG_VALIDATORS_PATH):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": snapshot.version, "validators": dict(snapshot.validators)}, f)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(
+    path=CATALOG_PATH,
+    columnar_path=CATALOG_COLUMNAR_PATH,
+    validators_path=CATALOG_VALIDATORS_PATH,
+):
+    """Load the catalog, preferring the memory-mapped columnar copy when it is current."""
+    try:
+        if os.path.getmtime(columnar_path) >= os.path.getmtime(path):
+            catalog = load_catalog(columnar_path)
+            validators = load_validators(catalog.version, validators_path)
+            return CatalogSnapshot(catalog, validators, version=catalog.version)
+    except (OSError, ValueError):
+        pass
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            records = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Could not load catalog from {path}: {str(e)}")
+        records = []
+    records = [r for r in records if r.get("url")]
+    version = compute_version(records)
+    snapshot = CatalogSnapshot(records, load_validators(version, validators_path), version)
+
+    if snapshot.records:
+        try:
+            write_columnar(snapshot.records, columnar_path, version=snapshot.version)
+        except OSError as e:
+            logger.warning(f"Could not write columnar catalog {columnar_path}: {str(e)}")
+    return snapshot
+
+
+def save_snapshot(
+    snapshot,
+    path=CATALOG_PATH,
+    columnar_path=CATALOG_COLUMNAR_PATH,
+    validators_path=CATALOG_VALIDATORS_PATH,
+):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(list(snapshot.records), f, indent=4, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    write_columnar(snapshot.records, columnar_path, version=snapshot.version)
+    save_validators(snapshot, validators_path)
+
+
+# Loaded on first access (normally during app warm-up), not at import time.
+catalog_store = CatalogStore(loader=load_snapshot)
+
+
+def get_snapshot():
+    return catalog_store.current()
+
+
+def resolve_assessments(assessment_urls, snapshot=None):
+    """Turn search results into detail records, preferring the catalog snapshot.
+
+    Only URLs the snapshot has never seen are fetched from shl.com.
+    """
+    snapshot = snapshot if snapshot is not None else get_snapshot()
+    resolved = []
+    seen = set()
+
+    for url_dict in assessment_urls:
+        url = url_dict["url"]
+        if url in seen:
+            continue
+        seen.add(url)
+
+        record = snapshot.get(url)
+        if record is None:
+            record = get_assessment_details(url)
+        if record:
+            resolved.append(record)
+
+    return resolved
@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import logging
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from api.cache_warming import CACHE_WARMING, warm_caches
+from api.catalog import (
+    CatalogSnapshot,
+    catalog_store,
+    load_snapshot,
+    save_snapshot,
+    save_validators,
+)
+from api.extraction import ExtractionPool
+from api.shared_cache import shared_cache
+from api.shl_scraper import fetch_page, iter_catalog_listing_urls
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = int(os.getenv("CATALOG_REFRESH_INTERVAL", "21600"))
+REFRESH_CONCURRENCY = int(os.getenv("CATALOG_REFRESH_CONCURRENCY", "4"))
+# Upper bound on one crawl; other workers wait this long for it.
+REFRESH_LOCK_TTL = int(os.getenv("CATALOG_REFRESH_LOCK_TTL", "1800"))
+
+# Holds the version of the last refresh, for half an interval, so workers whose
+# timers fire a little apart don't each crawl.
+refresh_cache = shared_cache.namespace("catalog_refresh", REFRESH_INTERVAL // 2)
+
+
+def _fetch_detail(url, previous):
+    """Return ``(record, validator, body)`` for ``url``.
+
+    ``body`` holds the raw page only when it changed and still needs parsing;
+    otherwise ``record`` is the previous record.
+    """
+    old_record = previous.get(url)
+    old_validator = previous.validators.get(url, {}) if old_record else {}
+
+    try:
+        status, body, etag = fetch_page(url, etag=old_validator.get("etag"))
+    except Exception as e:
+        logger.warning(f"Keeping previous record for {url}: {str(e)}")
+        return old_record, old_validator, None
+
+    if status == 304:
+        return old_record, old_validator, None
+
+    content_hash = hashlib.sha256(body).hexdigest()
+    validator = {"etag": etag, "hash": content_hash}
+    if old_record and old_validator.get("hash") == content_hash:
+        return old_record, validator, None
+
+    return None, validator, body
+
+
+def build_snapshot(previous):
+    """Re-crawl the listing and build a new snapshot, parsing only changed pages.
+
+    Pages are fetched on a thread pool and the changed ones are parsed in an
+    ``ExtractionPool`` as they arrive, so network and HTML parsing overlap.
+    """
+    try:
+        urls = list(dict.fromkeys(iter_catalog_listing_urls()))
+    except Exception as e:
+        logger.error(f"Catalog listing crawl incomplete; keeping current snapshot: {str(e)}")
+        return previous
+    if not urls:
+        logger.warning("Catalog listing crawl returned no assessments; keeping current snapshot")
+        return previous
+
+    results = []
+    with (
+        ThreadPoolExecutor(max_workers=REFRESH_CONCURRENCY) as fetchers,
+        ExtractionPool() as parsers,
+    ):
+        for url, (record, validator, body) in zip(
+            urls, fetchers.map(lambda u: _fetch_detail(u, previous), urls)
+        ):
+            if body is not None:
+                record = parsers.submit(url, body)
+            results.append((url, record, validator))
+
+        records = []
+        validators = {}
+        for url, record, validator in results:
+            if isinstance(record, Future):
+                try:
+                    record = record.result()
+                except Exception as e:
+                    logger.error(f"Failed to parse {url}: {str(e)}")
+                    record = previous.get(url)
+                    validator = previous.validators.get(url, {})
+            if record:
+                records.append(record)
+                validators[url] = validator
+
+    return CatalogSnapshot(records, validators)
+
+
+def _crawl_and_save(store):
+    previous = store.current()
+    snapshot = build_snapshot(previous)
+
+    if snapshot is previous:
+        return previous.version
+
+    store.swap(snapshot)
+    if snapshot.version == previous.version:
+        logger.info(f"Catalog unchanged at version {previous.version}")
+        # ETags can change while the content stays the same.
+        try:
+            save_validators(snapshot)
+        except OSError as e:
+            logger.error(f"Failed to persist catalog validators: {str(e)}")
+        return snapshot.version
+
+    try:
+        save_snapshot(snapshot)
+    except OSError as e:
+        logger.error(f"Failed to persist catalog snapshot: {str(e)}")
+    return snapshot.version
+
+
+def _sync_vector_index(snapshot):
+    """Embed whatever the index is missing or has stale for ``snapshot``.
+
+    Runs on every refresh, not only when the catalog changed, so an index
+    that was deleted, never built, or interrupted mid-sync is caught up at
+    the next startup. Workers sync one at a time; once one has caught up,
+    the others only compare text hashes.
+    """
+    # Imported here so numpy and the embedding model load only when the index is in use.
+    from api import vector_index
+
+    if not vector_index.VECTOR_INDEX:
+        return
+    try:
+        with refresh_cache.filling("vector_index", wait=REFRESH_LOCK_TTL, lock_ttl=REFRESH_LOCK_TTL):
+            vector_index.sync_catalog(vector_index.get_vector_index(), snapshot.records)
+    except Exception as e:
+        logger.error(f"Failed to update vector index: {str(e)}")
+
+
+def refresh_catalog(store=catalog_store):
+    """Refresh the catalog once per interval across all worker processes on the host.
+
+    The first worker to get here crawls and saves the snapshot; the others
+    wait for it and load the saved files, so every worker ends up serving the
+    same catalog version. The worker that crawled a new version then re-warms
+    the search cache, after releasing the lock so the others are not held up.
+    """
+    crawled = {}
+
+    def crawl():
+        before = store.current().version
+        version = _crawl_and_save(store)
+        crawled["changed"] = version != before
+        return version
+
+    version = refresh_cache.get_or_set(
+        "version", crawl, wait=REFRESH_LOCK_TTL, lock_ttl=REFRESH_LOCK_TTL
+    )
+    if version and version != store.current().version:
+        logger.info(f"Loading catalog version {version} saved by another worker")
+        store.swap(load_snapshot())
+    _sync_vector_index(store.current())
+
+    if CACHE_WARMING and crawled.get("changed"):
+        # Search results may have changed with the catalog; re-fetch the popular ones.
+        try:
+            warm_caches(force=True)
+        except Exception as e:
+            logger.error(f"Cache warming failed: {str(e)}")
+    return store.current()
+
+
+async def run_refresher(interval=REFRESH_INTERVAL, store=catalog_store):
+    """Refresh the catalog at startup and then forever; meant to run as a background task of the app.
+
+    The startup refresh goes through the same cross-worker lock, so a restart
+    within half an interval of the last refresh only reloads the saved catalog.
+    """
+    while True:
+        try:
+            await asyncio.to_thread(refresh_catalog, store)
+        except Exception as e:
+            logger.error(f"Catalog refresh failed: {str(e)}")
+        await asyncio.sleep(interval)
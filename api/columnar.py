@@ -0,0 +1,247 @@
+"""Compact, memory-mappable on-disk format for the assessment catalog.
+
+Layout: an 8-byte magic, a little-endian ``uint32`` header length, a JSON header
+and then 8-byte aligned columns. Categorical fields are dictionary-encoded into
+integer arrays (list fields as CSR offsets + codes), ``assessment_time`` is also
+pre-parsed into whole minutes, and URLs/descriptions live in one UTF-8 blob
+each with offsets. Any other record keys are kept as one JSON object per record
+in an ``extra`` blob. Opening a file maps it and decodes a record only when it
+is indexed.
+
+Convert the JSON catalog with:
+
+    python -m api.columnar assessments_data.json assessments_data.cat
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from functools import lru_cache
+
+from api.shl_scraper import parse_duration
+
+MAGIC = b"SHLCAT1\0"
+# Code width by typecode; the largest value of each is reserved for "missing",
+# so it is never a dictionary code.
+MISSING = {"H": 0xFFFF, "I": 0xFFFFFFFF}
+
+LIST_FIELDS = ("job_levels", "languages")
+CODED_FIELDS = ("assessment_time", "test_type", "remote_testing")
+TEXT_FIELDS = ("url", "description")
+KNOWN_FIELDS = frozenset(LIST_FIELDS + CODED_FIELDS + TEXT_FIELDS)
+
+
+def _pad(n):
+    return (-n) % 8
+
+
+def _dictionary(values):
+    return sorted({v for v in values if v is not None})
+
+
+def _code_type(field, dictionary):
+    """Narrowest typecode whose codes (and missing sentinel) fit ``dictionary``."""
+    for typecode, missing in MISSING.items():
+        if len(dictionary) < missing:
+            return typecode
+    raise ValueError(f"Too many distinct values for column {field}: {len(dictionary)}")
+
+
+def _blob(texts):
+    offsets, blob = array("I", [0]), bytearray()
+    for text in texts:
+        blob += text.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, array("B", blob)
+
+
+def write_columnar(records, path, version=None):
+    """Serialize ``records`` to ``path`` atomically."""
+    records = list(records)
+    dictionaries = {}
+    columns = []
+
+    for field in LIST_FIELDS:
+        dictionaries[field] = _dictionary(v for r in records for v in r.get(field) or ())
+        lookup = {v: i for i, v in enumerate(dictionaries[field])}
+        offsets, codes = array("I", [0]), array(_code_type(field, dictionaries[field]))
+        for r in records:
+            codes.extend(lookup[v] for v in r.get(field) or ())
+            offsets.append(len(codes))
+        columns += [(f"{field}.offsets", offsets), (f"{field}.codes", codes)]
+
+    for field in CODED_FIELDS:
+        dictionaries[field] = _dictionary(r.get(field) for r in records)
+        lookup = {v: i for i, v in enumerate(dictionaries[field])}
+        typecode = _code_type(field, dictionaries[field])
+        missing = MISSING[typecode]
+        columns.append((field, array(typecode, (lookup.get(r.get(field), missing) for r in records))))
+
+    columns.append(
+        ("duration", array("i", (parse_duration(r.get("assessment_time", "")) for r in records)))
+    )
+
+    for field in TEXT_FIELDS:
+        offsets, blob = _blob(r.get(field) or "" for r in records)
+        columns += [(f"{field}.offsets", offsets), (f"{field}.blob", blob)]
+
+    extras = [{k: v for k, v in r.items() if k not in KNOWN_FIELDS} for r in records]
+    offsets, blob = _blob(json.dumps(e, ensure_ascii=False) if e else "" for e in extras)
+    columns += [("extra.offsets", offsets), ("extra.blob", blob)]
+
+    layout = {}
+    position = 0
+    for name, data in columns:
+        nbytes = len(data) * data.itemsize
+        layout[name] = {"offset": position, "typecode": data.typecode, "length": len(data)}
+        position += nbytes + _pad(nbytes)
+
+    header = json.dumps(
+        {
+            "count": len(records),
+            "version": version,
+            "byteorder": sys.byteorder,
+            "dictionaries": dictionaries,
+            "columns": layout,
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+    preamble = MAGIC + struct.pack("<I", len(header)) + header
+    preamble += b"\0" * _pad(len(preamble))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(preamble)
+        for _, data in columns:
+            raw = data.tobytes()
+            f.write(raw)
+            f.write(b"\0" * _pad(len(raw)))
+    os.replace(tmp_path, path)
+
+
+class ColumnarCatalog:
+    """Read-only sequence of catalog records backed by a memory-mapped file.
+
+    Indexing returns a freshly decoded ``dict`` in the same shape as the JSON
+    catalog. The numeric ``duration`` column, the coded columns (``column``)
+    and single fields (``values``) can be read without decoding whole records.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[: len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a columnar catalog")
+        (header_len,) = struct.unpack_from("<I", self._mmap, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(self._mmap[start : start + header_len].decode("utf-8"))
+        if header["byteorder"] != sys.byteorder:
+            raise ValueError(f"{path} was written on a {header['byteorder']}-endian host")
+
+        data_start = start + header_len
+        data_start += _pad(data_start)
+        view = memoryview(self._mmap)
+
+        self.path = path
+        self.version = header["version"]
+        self.dictionaries = header["dictionaries"]
+        self._count = header["count"]
+        self._columns = {}
+        for name, spec in header["columns"].items():
+            itemsize = array(spec["typecode"]).itemsize
+            offset = data_start + spec["offset"]
+            column = view[offset : offset + spec["length"] * itemsize]
+            self._columns[name] = column.cast(spec["typecode"]) if spec["typecode"] != "B" else column
+
+        self.duration = self._columns["duration"]
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+    def _text(self, field, i):
+        offsets = self._columns[f"{field}.offsets"]
+        return bytes(self._columns[f"{field}.blob"][offsets[i] : offsets[i + 1]]).decode("utf-8")
+
+    def url(self, i):
+        return self._text("url", i)
+
+    def column(self, name):
+        """The raw column ``name``, e.g. ``"test_type"`` codes or ``"languages.offsets"``."""
+        return self._columns[name]
+
+    def values(self, field):
+        """Yield ``field`` of every record as ``__getitem__`` decodes it, ``None`` when absent."""
+        if field in TEXT_FIELDS:
+            for i in range(self._count):
+                yield self._text(field, i) or None
+        elif field in LIST_FIELDS:
+            offsets = self._columns[f"{field}.offsets"]
+            codes = self._columns[f"{field}.codes"]
+            dictionary = self.dictionaries[field]
+            for i in range(self._count):
+                yield [dictionary[c] for c in codes[offsets[i] : offsets[i + 1]]] or None
+        elif field in CODED_FIELDS:
+            column = self._columns[field]
+            missing = MISSING[column.format]
+            dictionary = self.dictionaries[field]
+            for code in column:
+                yield None if code == missing else dictionary[code]
+        else:
+            for record in self:
+                yield record.get(field)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+
+        record = {"url": self._text("url", i)}
+        description = self._text("description", i)
+        if description:
+            record["description"] = description
+        for field in LIST_FIELDS:
+            offsets = self._columns[f"{field}.offsets"]
+            codes = self._columns[f"{field}.codes"][offsets[i] : offsets[i + 1]]
+            if len(codes):
+                values = self.dictionaries[field]
+                record[field] = [values[c] for c in codes]
+        for field in CODED_FIELDS:
+            column = self._columns[field]
+            code = column[i]
+            if code != MISSING[column.format]:
+                record[field] = self.dictionaries[field][code]
+        # Files written before the extra column existed have none.
+        if "extra.offsets" in self._columns:
+            extra = self._text("extra", i)
+            if extra:
+                record.update(json.loads(extra))
+        return record
+
+
+@lru_cache(maxsize=4)
+def _open(path, mtime_ns, size):
+    return ColumnarCatalog(path)
+
+
+def load_catalog(path):
+    """Open ``path`` once per process; a rewritten file is reopened automatically."""
+    stat = os.stat(path)
+    return _open(path, stat.st_mtime_ns, stat.st_size)
+
+
+if __name__ == "__main__":
+    source, target = sys.argv[1], sys.argv[2]
+    with open(source, "r", encoding="utf-8") as f:
+        write_columnar(json.load(f), target)
+    print(f"Wrote {len(load_catalog(target))} assessments to {target}")
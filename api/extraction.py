@@ -0,0 +1,72 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from api.shl_scraper import parse_assessment_details
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# 0 parses in the calling thread, which is what small refreshes want: with saved
+# validators most pages come back unchanged. Set it to the CPU count for full crawls.
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "0"))
+EXTRACTION_CHUNKSIZE = int(os.getenv("EXTRACTION_CHUNKSIZE", "8"))
+
+
+def _parse(url, body):
+    return parse_assessment_details(body, url)
+
+
+def _parse_batch(batch):
+    return [_parse(url, body) for url, body in batch]
+
+
+class ExtractionPool:
+    """Parses assessment pages in worker processes so HTML parsing scales past the GIL.
+
+    Pages are handed over as the raw response bytes, which pickle as a single
+    copy, and decoded by BeautifulSoup in the worker. Workers are spawned
+    rather than forked, so the pool is safe to start from a process that
+    already runs threads. With ``workers=0`` everything is parsed inline.
+    """
+
+    def __init__(self, workers=EXTRACTION_WORKERS):
+        self.workers = workers
+        self._executor = None
+        if workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    def submit(self, url, body):
+        """Schedule one page; returns a future resolving to its detail record."""
+        if self._executor is None:
+            future = Future()
+            try:
+                future.set_result(_parse(url, body))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self._executor.submit(_parse, url, body)
+
+    def parse_many(self, pages, chunksize=EXTRACTION_CHUNKSIZE):
+        """Parse ``(url, body)`` pairs in order, ``chunksize`` pages per round trip."""
+        pages = list(pages)
+        if self._executor is None:
+            return [_parse(url, body) for url, body in pages]
+        batches = [pages[i : i + chunksize] for i in range(0, len(pages), chunksize)]
+        return [record for batch in self._executor.map(_parse_batch, batches) for record in batch]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
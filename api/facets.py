@@ -0,0 +1,223 @@
+import re
+from bisect import bisect_left, bisect_right
+
+from api.columnar import LIST_FIELDS, MISSING, ColumnarCatalog
+from api.shl_scraper import parse_duration
+
+FACET_FIELDS = ("job_levels", "languages", "test_type", "remote_testing")
+
+
+def record_duration(record):
+    """Completion time in minutes, or ``None`` when the catalog gives no number."""
+    minutes = parse_duration(record.get("assessment_time", ""))
+    return minutes or None
+
+
+def _facet_values(record, field):
+    value = record.get(field)
+    if not value:
+        return ()
+    if field == "test_type":
+        # Keys are rendered as a run of letters, e.g. "K" or "AKP".
+        return tuple(ch for ch in str(value) if ch.isalpha())
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    return (value,)
+
+
+def _to_mask(bitmap):
+    return int.from_bytes(bitmap, "little")
+
+
+def _record_postings(records):
+    """``(field, value, i)`` for every facet value of decoded records."""
+    for i, record in enumerate(records):
+        for field in FACET_FIELDS:
+            for value in _facet_values(record, field):
+                yield field, value, i
+
+
+def _column_postings(catalog):
+    """``(field, value, i)`` read straight from a columnar catalog's coded columns."""
+    for field in FACET_FIELDS:
+        dictionary = catalog.dictionaries[field]
+        if field in LIST_FIELDS:
+            offsets = catalog.column(f"{field}.offsets")
+            codes = catalog.column(f"{field}.codes")
+            for i in range(len(catalog)):
+                for code in codes[offsets[i] : offsets[i + 1]]:
+                    yield field, dictionary[code], i
+        else:
+            column = catalog.column(field)
+            missing = MISSING[column.format]
+            decoded = [_facet_values({field: value}, field) for value in dictionary]
+            for i, code in enumerate(column):
+                if code != missing:
+                    for value in decoded[code]:
+                        yield field, value, i
+
+
+class FacetIndex:
+    """Bitset index over the catalog's filterable fields.
+
+    Every facet value maps to an int whose bit ``i`` is set when record ``i``
+    carries that value, so combining filters is a handful of big-int ``&``/``|``
+    operations. Durations are indexed as cumulative "at most N minutes" masks
+    over the distinct values, which turns a range filter into two bisects.
+    A ``ColumnarCatalog`` is indexed from its coded and ``duration`` columns
+    without decoding any record.
+    """
+
+    __slots__ = ("size", "all_mask", "facets", "_durations", "_le_masks")
+
+    def __init__(self, records):
+        if isinstance(records, ColumnarCatalog):
+            postings, durations = _column_postings(records), records.duration
+        else:
+            records = list(records)
+            postings = _record_postings(records)
+            durations = [record_duration(record) for record in records]
+        self.size = len(durations)
+        self.all_mask = (1 << self.size) - 1
+        nbytes = (self.size + 7) // 8
+
+        bitmaps = {field: {} for field in FACET_FIELDS}
+        for field, value, i in postings:
+            bitmap = bitmaps[field].get(value)
+            if bitmap is None:
+                bitmap = bitmaps[field][value] = bytearray(nbytes)
+            bitmap[i >> 3] |= 1 << (i & 7)
+
+        duration_bitmaps = {}
+        for i, minutes in enumerate(durations):
+            # The columnar file stores 0 where the catalog gives no number.
+            if minutes:
+                bitmap = duration_bitmaps.get(minutes)
+                if bitmap is None:
+                    bitmap = duration_bitmaps[minutes] = bytearray(nbytes)
+                bitmap[i >> 3] |= 1 << (i & 7)
+
+        self.facets = {
+            field: {value: _to_mask(bitmap) for value, bitmap in values.items()}
+            for field, values in bitmaps.items()
+        }
+
+        self._durations = sorted(duration_bitmaps)
+        self._le_masks = []
+        running = 0
+        for minutes in self._durations:
+            running |= _to_mask(duration_bitmaps[minutes])
+            self._le_masks.append(running)
+
+    def values(self, field):
+        return sorted(self.facets[field])
+
+    def any_of(self, field, values):
+        mask = 0
+        facet = self.facets[field]
+        for value in values:
+            mask |= facet.get(value, 0)
+        return mask
+
+    def duration_range(self, min_minutes=None, max_minutes=None):
+        if not self._durations:
+            return 0
+        upper = len(self._durations)
+        if max_minutes is not None:
+            upper = bisect_right(self._durations, max_minutes)
+        mask = self._le_masks[upper - 1] if upper else 0
+        if min_minutes is not None:
+            lower = bisect_left(self._durations, min_minutes)
+            if lower:
+                mask &= ~self._le_masks[lower - 1]
+        return mask
+
+    def query(
+        self,
+        job_levels=None,
+        languages=None,
+        test_types=None,
+        remote=None,
+        min_minutes=None,
+        max_minutes=None,
+    ):
+        """Return the mask of records matching every given constraint.
+
+        Within a facet the values are OR-ed, across facets they are AND-ed;
+        ``None`` leaves a facet unconstrained.
+        """
+        mask = self.all_mask
+        if job_levels:
+            mask &= self.any_of("job_levels", job_levels)
+        if languages:
+            mask &= self.any_of("languages", self.expand_languages(languages))
+        if test_types:
+            mask &= self.any_of("test_type", test_types)
+        if remote is not None:
+            mask &= self.facets["remote_testing"].get("Yes" if remote else "No", 0)
+        if min_minutes is not None or max_minutes is not None:
+            mask &= self.duration_range(min_minutes, max_minutes)
+        return mask
+
+    def expand_languages(self, languages):
+        """Map parser languages onto catalog variants ("English" -> "English (USA)", ...)."""
+        known = self.facets["languages"]
+        expanded = []
+        for language in languages:
+            for value in known:
+                if value == language or value.startswith(language + " "):
+                    expanded.append(value)
+        return expanded
+
+    @staticmethod
+    def indices(mask):
+        bits = bin(mask)[:1:-1]
+        result = []
+        i = bits.find("1")
+        while i != -1:
+            result.append(i)
+            i = bits.find("1", i + 1)
+        return result
+
+    @staticmethod
+    def count(mask):
+        return mask.bit_count()
+
+
+def parse_duration_filter(text):
+    """Turn a parser duration such as "30 minutes", "<= 45 min" or "20-40 minutes"
+    into ``(min_minutes, max_minutes)``. A bare number is read as an upper bound."""
+    if not text:
+        return None, None
+    text = str(text).lower()
+    numbers = [int(n) for n in re.findall(r"\d+", text)]
+    if not numbers:
+        return None, None
+    if len(numbers) >= 2 and re.search(r"\d\s*(?:-|to)\s*\d", text):
+        return min(numbers[:2]), max(numbers[:2])
+    if re.search(r">=?|≥|at least|min(?:imum)? of|more than|over", text):
+        return numbers[0], None
+    return None, numbers[0]
+
+
+def query_from_filters(filters):
+    """Translate parsed ``Filters`` into ``FacetIndex.query`` kwargs."""
+    kwargs = {}
+    if filters.job_level:
+        kwargs["job_levels"] = [filters.job_level]
+    if filters.language:
+        kwargs["languages"] = [filters.language]
+    if filters.test_types:
+        kwargs["test_types"] = list(filters.test_types.letters)
+    if filters.remote is not None:
+        kwargs["remote"] = filters.remote
+    if filters.min_minutes is not None:
+        kwargs["min_minutes"] = filters.min_minutes
+    if filters.max_minutes is not None:
+        kwargs["max_minutes"] = filters.max_minutes
+    return kwargs
+
+
+def filter_records(records, index, filters):
+    mask = index.query(**query_from_filters(filters))
+    return [records[i] for i in index.indices(mask)]
@@ -1,11 +1,16 @@
 import os
-import google.generativeai as genai
 import re
 import json
 import logging
+import threading
+import time
 from typing import Dict, Any, Optional
 from dotenv import load_dotenv
 
+from api.models import Filters
+from api.response_cache import filters_cache, text_key
+from api.traffic_capture import record_llm
+
 load_dotenv()
 
 logging.basicConfig(
@@ -100,6 +105,8 @@ class GeminiQueryParser:
                 "Gemini API key is required. Provide it directly or set GEMINI_API_KEY environment variable."
             )
 
+        import google.generativeai as genai
+
         genai.configure(api_key=api_key)
 
         self.model = genai.GenerativeModel("gemini-2.5-flash-preview-04-17")
@@ -111,9 +118,11 @@ class GeminiQueryParser:
         prompt = self._build_prompt(query)
 
         try:
+            start = time.perf_counter()
             response = self.model.generate_content(prompt)
 
             filters_text = response.text.strip()
+            record_llm("parse", filters_text, time.perf_counter() - start)
             logger.debug(f"Raw Gemini response: {filters_text}")
 
             if filters_text:
@@ -330,10 +339,27 @@ class GeminiQueryParser:
         return filters
 
 
-def parse_query_with_gemini(query: str) -> Dict[str, Any]:
+_parser: Optional[GeminiQueryParser] = None
+_parser_lock = threading.Lock()
+
+
+def get_parser() -> GeminiQueryParser:
+    """Shared parser, so the client is configured once per process rather than per request."""
+    global _parser
+    if _parser is None:
+        with _parser_lock:
+            if _parser is None:
+                _parser = GeminiQueryParser()
+    return _parser
+
+
+def parse_query_with_gemini(query: str) -> Filters:
     try:
-        parser = GeminiQueryParser()
-        return parser.parse_query(query)
+        # Filters are shared across worker processes, keyed by the query text,
+        # and cached as the parser's JSON; they are validated once here.
+        return Filters.from_dict(
+            filters_cache.get_or_set(text_key(query), lambda: get_parser().parse_query(query))
+        )
     except Exception as e:
         logger.error(f"Error parsing query: {str(e)}")
-        return {}
+        return Filters()
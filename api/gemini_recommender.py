@@ -1,11 +1,36 @@
 import os
 import json
-import google.generativeai as genai
+import logging
 import re
+import threading
+import time
 
-api_key = os.getenv("GEMINI_API_KEY")
+from api.catalog import catalog_store, get_snapshot
+from api.prompt_cache import CatalogContextCache, GeminiBackend
+from api.shared_cache import write_file_atomic
+from api.traffic_capture import record_llm
 
-genai.configure(api_key=api_key)
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "gemini-2.5-flash-preview-04-17"
+PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "1") == "1"
+PROMPT_CACHE_TTL = int(os.getenv("PROMPT_CACHE_TTL", "3600"))
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_model():
+    """Configure the Gemini client on first use instead of at import time."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import google.generativeai as genai
+
+                genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+                _model = genai.GenerativeModel(MODEL_NAME)
+    return _model
 
 def extract_valid_json(response_text):
     try:
@@ -19,25 +44,40 @@ def extract_valid_json(response_text):
         return {}
 
 
-def load_assessments(json_path="assessments_data.json"):
+def load_assessments(json_path=None):
+    if json_path is None:
+        return list(get_snapshot().records)
     with open(json_path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
-def fix_recommended_assessments_json(response_json: dict) -> dict:
-    required_fields = {
-        "url": str,
-        "adaptive_support": str,
-        "description": str,
-        "duration": int,
-        "remote_support": str,
-        "test_type": list,
-    }
+RECOMMENDATION_FIELDS = {
+    "url": str,
+    "adaptive_support": str,
+    "description": str,
+    "duration": int,
+    "remote_support": str,
+    "test_type": list,
+}
+
+
+def fix_recommended_assessments_json(response_json: dict, fields=None, k=None) -> dict:
+    """Validate and coerce the model's recommendations.
+
+    Only the requested ``fields`` (default: all) are checked and copied, and
+    at most ``k`` recommendations are kept.
+    """
+    if fields is None:
+        required_fields = RECOMMENDATION_FIELDS
+    else:
+        required_fields = {f: RECOMMENDATION_FIELDS[f] for f in RECOMMENDATION_FIELDS if f in fields}
 
     fixed_assessments = []
     assessments = response_json.get("recommended_assessments", [])
 
     for assessment in assessments:
+        if k is not None and len(fixed_assessments) >= k:
+            break
         if not isinstance(assessment, dict):
             continue
 
@@ -67,53 +107,137 @@ def fix_recommended_assessments_json(response_json: dict) -> dict:
     return {"recommended_assessments": fixed_assessments}
 
 
-def get_top_assessments_with_gemini(user_query, k=10):
-    model = genai.GenerativeModel("gemini-2.5-flash-preview-04-17")
-
-    assessments = load_assessments()
-    prompt = f"""
+RANKING_INSTRUCTIONS = """
 You are an intelligent assessment recommender first understand the context then proceedए.
 
 Given a user's job description or query, and a catalog of assessments,
-recommend at most {k} of the most relevant assessments.
+recommend the most relevant assessments.
 
 Return only a valid JSON object with this exact format:
-{{
+{
   "recommended_assessments": [
-    {{
+    {
       "url": "...",
       "adaptive_support": "Yes" or "No",
       "description": "...",
       "duration": integer,
       "remote_support": "Yes" or "No",
       "test_type": [list of strings]
-    }},
+    },
     ...
   ]
-}}
+}
 
 The JSON object should contain a list of recommended assessments.
 You must not include any other text or explanation. Please do not add any additional information or context.
 Do not include any markdown, code block formatting, or extra commentary.
 Only use this format to return the JSON object. Do not deviate from this format.
+"""
 
-Input Query:
-"{user_query}"
 
+def build_catalog_context(assessments):
+    """Static prompt prefix: instructions plus catalog, identical for every query on a snapshot."""
+    # Same text as json.dumps(list(assessments)), without decoding the whole
+    # catalog into one list first.
+    catalog = ", ".join(json.dumps(assessment) for assessment in assessments)
+    return f"""{RANKING_INSTRUCTIONS}
 Assessment Catalog:
-{json.dumps(assessments)}
+[{catalog}]
 """
 
-    response = model.generate_content(prompt)
-    response_text = response.text if hasattr(response, "text") else str(response)
+
+def build_query_prompt(
+    user_query, k, candidate_urls=None, extra_assessments=None, fields=None, search_hits=None
+):
+    """Per-request prompt suffix: the query, ``k`` and optionally the search shortlist."""
+    prompt = f"""
+Recommend at most {k} of the most relevant assessments.
+"""
+    if fields:
+        prompt += f"""
+Only include these keys in each recommended assessment: {json.dumps(list(fields))}
+"""
+    if candidate_urls is not None:
+        prompt += f"""
+Only recommend assessments whose url is in this list of search results:
+{json.dumps(candidate_urls)}
+"""
+    if extra_assessments:
+        prompt += f"""
+Additional assessments not in the catalog above:
+{json.dumps(extra_assessments)}
+"""
+    if search_hits:
+        prompt += f"""
+These urls were returned by several of the keyword searches for this query (url: number of searches); prefer them when otherwise equally relevant:
+{json.dumps(search_hits)}
+"""
+    prompt += f"""
+Input Query:
+"{user_query}"
+"""
+    return prompt
+
+
+ranking_backend = GeminiBackend(get_model)
+context_cache = CatalogContextCache(
+    ranking_backend,
+    build_catalog_context,
+    ttl=PROMPT_CACHE_TTL,
+)
+catalog_store.subscribe(context_cache.invalidate)
+
+
+def set_ranking_backend(backend):
+    """Swap the LLM backend, e.g. for ``RecordingBackend`` in local benchmarks."""
+    global ranking_backend
+    # The current handle belongs to the old backend, so drop it before swapping.
+    context_cache.invalidate()
+    ranking_backend = backend
+    context_cache.backend = backend
+
+
+def _generate_ranking(user_query, k, assessments, fields=None, search_hits=None):
+    snapshot = get_snapshot()
+
+    if PROMPT_CACHE_ENABLED:
+        handle = context_cache.handle_for(snapshot)
+        if handle is not None:
+            if assessments is None:
+                prompt = build_query_prompt(user_query, k, fields=fields)
+            else:
+                prompt = build_query_prompt(
+                    user_query,
+                    k,
+                    candidate_urls=[a["url"] for a in assessments],
+                    extra_assessments=[a for a in assessments if snapshot.get(a["url"]) is None],
+                    fields=fields,
+                    search_hits=search_hits,
+                )
+            try:
+                return ranking_backend.generate(handle, prompt)
+            except Exception as e:
+                logger.warning(f"Cached-context ranking failed, retrying with plain prompt: {str(e)}")
+
+    if assessments is None:
+        assessments = load_assessments()
+    prompt = build_catalog_context(assessments) + build_query_prompt(
+        user_query, k, fields=fields, search_hits=search_hits
+    )
+    return ranking_backend.generate_plain(prompt)
+
+
+def get_top_assessments_with_gemini(user_query, k=10, assessments=None, fields=None, search_hits=None):
+    start = time.perf_counter()
+    response_text = _generate_ranking(user_query, k, assessments, fields, search_hits)
+    record_llm("ranking", response_text, time.perf_counter() - start)
     response_text = re.sub(r"```(json)?", "", response_text).strip()
 
-    with open("gemini_response.txt", "w", encoding="utf-8") as file:
-        file.write(response_text)
+    write_file_atomic("gemini_response.txt", response_text)
 
     try:
         raw_json = json.loads(response_text)
     except json.JSONDecodeError:
         raw_json = extract_valid_json(response_text)
 
-    return fix_recommended_assessments_json(raw_json)
+    return fix_recommended_assessments_json(raw_json, fields=fields, k=k)
@@ -0,0 +1,203 @@
+"""Extractive compression of long job descriptions before they reach the LLM.
+
+Boilerplate sections (benefits, EEO statements, company history, how to apply)
+are dropped by heading, the remaining sentences are scored by TF-IDF salience
+against the catalog vocabulary, and the best ones are kept, in their original
+order, up to a token budget.
+"""
+
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+
+from api.catalog import catalog_store, get_snapshot
+from api.columnar import ColumnarCatalog
+from api.metrics import metrics
+from api.prompt_cache import count_tokens
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+JD_COMPRESSION = os.getenv("JD_COMPRESSION", "1") == "1"
+JD_TOKEN_BUDGET = int(os.getenv("JD_TOKEN_BUDGET", "400"))
+
+BOILERPLATE_HEADINGS = re.compile(
+    r"^(about (us|the company|our company)|who we are|our (story|mission|values|culture|company)|"
+    r"(what we offer|benefits|perks|compensation|salary|pay range|why (join|work)|life at)|"
+    r"(equal (employment )?opportunity|eeo|diversity|inclusion|accommodations?|disclaimer|"
+    r"privacy|how to apply|application process|next steps))\b",
+    re.IGNORECASE,
+)
+BOILERPLATE_SENTENCES = re.compile(
+    r"equal opportunity employer|without regard to|reasonable accommodation|"
+    r"protected (veteran|characteristic|status)|e-verify|background check|"
+    r"applicants? (will|must) be|we (are|were) founded|recruitment agenc",
+    re.IGNORECASE,
+)
+TOKEN = re.compile(r"[a-z][a-z0-9+#]*")
+SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9])")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was "
+    "were will with you your we our they their who which what can all any not".split()
+)
+
+
+def _tokens(text):
+    return [t for t in TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class CatalogVocabulary:
+    """IDF weights of the words used in catalog descriptions and metadata."""
+
+    def __init__(self, records):
+        if isinstance(records, ColumnarCatalog):
+            # Only three fields are needed; read them without decoding records.
+            rows = zip(
+                records.values("description"), records.values("job_levels"), records.values("url")
+            )
+        else:
+            rows = ((r.get("description"), r.get("job_levels"), r.get("url")) for r in records)
+
+        document_frequency = Counter()
+        documents = 0
+        for description, job_levels, url in rows:
+            text = " ".join(
+                [description or ""]
+                + list(job_levels or [])
+                + [(url or "").rstrip("/").rsplit("/", 1)[-1].replace("-", " ")]
+            )
+            document_frequency.update(set(_tokens(text)))
+            documents += 1
+        self.idf = {
+            term: math.log((1 + documents) / (1 + df)) + 1.0
+            for term, df in document_frequency.items()
+        }
+        # Words the catalog never uses still carry some signal, just less than
+        # the most common catalog word.
+        self.unknown_weight = 0.5 * min(self.idf.values(), default=1.0)
+
+    def weight(self, term):
+        return self.idf.get(term, self.unknown_weight)
+
+
+_vocabulary = None
+_vocabulary_lock = threading.Lock()
+
+
+def get_vocabulary():
+    global _vocabulary
+    with _vocabulary_lock:
+        if _vocabulary is None:
+            _vocabulary = CatalogVocabulary(get_snapshot().records)
+        return _vocabulary
+
+
+def _reset_vocabulary(*args):
+    global _vocabulary
+    with _vocabulary_lock:
+        _vocabulary = None
+
+
+catalog_store.subscribe(_reset_vocabulary)
+
+
+TITLE_SMALL_WORDS = frozenset("a an and at for in of on or the to with".split())
+
+
+def _is_title(text):
+    """Title Case with no closing punctuation, e.g. "About Us" or "Perks and Benefits"."""
+    return text[-1] not in ".!?,;" and all(
+        word[0].isupper() or word in TITLE_SMALL_WORDS for word in text.split()
+    )
+
+
+def _is_heading(line):
+    """A short line shaped like a heading: ends with ':', markdown ``#``/bold, all caps or a title.
+
+    Wording alone doesn't count, so "Privacy engineering experience is
+    essential." stays a sentence rather than opening a boilerplate section.
+    """
+    line = line.strip()
+    stripped = line.rstrip(":").strip("#*- ").strip()
+    return bool(stripped) and len(stripped.split()) <= 8 and (
+        line.endswith(":")
+        or line.startswith("#")
+        or (line.startswith("**") and line.rstrip(":").endswith("**"))
+        or stripped.isupper()
+        or _is_title(stripped)
+    )
+
+
+def split_sentences(text):
+    """Split into sentences, dropping boilerplate sections, boilerplate and repeated sentences."""
+    sentences = []
+    seen = set()
+    skipping = False
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if _is_heading(line):
+            skipping = BOILERPLATE_HEADINGS.match(line.strip("#*- ").strip()) is not None
+            if not skipping:
+                sentences.append(line)
+            continue
+        if skipping:
+            continue
+        for sentence in SENTENCE_SPLIT.split(line):
+            sentence = sentence.strip(" •*-\t")
+            key = " ".join(sentence.lower().split())
+            if sentence and key not in seen and not BOILERPLATE_SENTENCES.search(sentence):
+                seen.add(key)
+                sentences.append(sentence)
+    return sentences
+
+
+def compress_job_description(text, budget=JD_TOKEN_BUDGET, vocabulary=None):
+    """Return ``(compressed_text, ratio)``; text within ``budget`` is returned unchanged."""
+    original_tokens = count_tokens(text)
+    if original_tokens <= budget:
+        return text, 1.0
+
+    vocabulary = vocabulary or get_vocabulary()
+    sentences = split_sentences(text)
+    if not sentences:
+        return text, 1.0
+
+    scored = []
+    for i, sentence in enumerate(sentences):
+        terms = Counter(_tokens(sentence))
+        salience = sum(math.log1p(tf) * vocabulary.weight(t) for t, tf in terms.items())
+        scored.append((salience / math.sqrt(len(sentence.split()) + 1), i))
+
+    # The opening line usually names the role, keep it regardless of score.
+    keep = {0}
+    used = count_tokens(sentences[0])
+    for score, i in sorted(scored, reverse=True):
+        if i in keep or score <= 0:
+            continue
+        cost = count_tokens(sentences[i])
+        if used + cost > budget:
+            continue
+        keep.add(i)
+        used += cost
+
+    compressed = "\n".join(sentences[i] for i in sorted(keep))
+    ratio = count_tokens(compressed) / original_tokens
+    return compressed, ratio
+
+
+def prepare_query(text):
+    """Compress ``text`` for prompting when enabled and record the ratio."""
+    if not JD_COMPRESSION:
+        return text
+    compressed, ratio = compress_job_description(text, budget=JD_TOKEN_BUDGET)
+    metrics.observe("jd_compression_ratio", ratio)
+    if ratio < 1.0:
+        logger.info(f"Compressed job description to {ratio:.0%} of its tokens")
+    return compressed
@@ -0,0 +1,205 @@
+import enum
+
+from api.facets import parse_duration_filter
+from api.search_planner import split_keywords
+from api.shl_scraper import SHL_FILTER_IDS
+
+_TRUE = ("yes", "true", "1")
+
+
+class TestType(enum.IntFlag):
+    """SHL test type keys; an assessment can carry several, e.g. ``K | P``."""
+
+    __test__ = False
+
+    A = 1  # Ability & Aptitude
+    B = 2  # Biodata & Situational Judgement
+    C = 4  # Competencies
+    D = 8  # Development & 360
+    E = 16  # Assessment Exercises
+    K = 32  # Knowledge & Skills
+    P = 64  # Personality & Behaviour
+    S = 128  # Simulations
+
+    @classmethod
+    def parse(cls, value):
+        """Accept letter runs ("AKP"), comma lists, full names or a list of any of those."""
+        if not value:
+            return cls(0)
+        if isinstance(value, (list, tuple)):
+            parts = [str(v) for v in value]
+        else:
+            parts = str(value).split(",")
+        bits = 0
+        for part in parts:
+            part = part.strip()
+            code = _TEST_TYPE_BITS.get(part.lower())
+            if code is not None:
+                bits |= code
+            else:
+                for letter in part.upper():
+                    bits |= _TEST_TYPE_BITS.get(letter, 0)
+        return cls(bits)
+
+    @property
+    def letters(self):
+        """The keys as SHL renders them, e.g. "KP"."""
+        return _TEST_TYPE_LETTERS[self]
+
+
+_TEST_TYPE_BITS = {
+    **{member.name: member.value for member in TestType},
+    "ability & aptitude": TestType.A.value,
+    "biodata & situational judgement": TestType.B.value,
+    "competencies": TestType.C.value,
+    "development & 360": TestType.D.value,
+    "assessment exercises": TestType.E.value,
+    "knowledge & skills": TestType.K.value,
+    "personality & behavior": TestType.P.value,
+    "personality & behaviour": TestType.P.value,
+    "simulations": TestType.S.value,
+}
+# Decoding flags member by member is slow, so every combination is rendered up front.
+_TEST_TYPE_LETTERS = [
+    "".join(member.name for member in TestType if member.value & bits) for bits in range(256)
+]
+
+
+def _clean(value):
+    value = str(value).strip() if value is not None else ""
+    return value or None
+
+
+def _known(value, kind):
+    """``value`` if SHL has a search filter ID for it, else ``None``."""
+    value = _clean(value)
+    return value if value in SHL_FILTER_IDS[kind] else None
+
+
+def _int_or_none(value):
+    try:
+        return int(value) if value is not None and value != "" else None
+    except (TypeError, ValueError):
+        return None
+
+
+class Filters:
+    """Search filters parsed from a query, validated once when the parser returns them.
+
+    Job families and industries SHL has no search ID for are dropped,
+    keywords are normalized and deduplicated, and the free-text duration is
+    parsed into minute bounds, so later stages read attributes instead of
+    re-checking dict entries. Job level and language stay free text since
+    the catalog facets match them against record values.
+    """
+
+    __slots__ = (
+        "keywords",
+        "job_family",
+        "job_level",
+        "industry",
+        "language",
+        "test_types",
+        "remote",
+        "min_minutes",
+        "max_minutes",
+        "duration",
+        "notes",
+    )
+
+    def __init__(
+        self,
+        keywords=(),
+        job_family=None,
+        job_level=None,
+        industry=None,
+        language=None,
+        test_types=TestType(0),
+        remote=None,
+        min_minutes=None,
+        max_minutes=None,
+        duration=None,
+        notes=None,
+    ):
+        self.keywords = keywords
+        self.job_family = job_family
+        self.job_level = job_level
+        self.industry = industry
+        self.language = language
+        self.test_types = test_types
+        self.remote = remote
+        self.min_minutes = min_minutes
+        self.max_minutes = max_minutes
+        self.duration = duration
+        self.notes = notes
+
+    @classmethod
+    def from_dict(cls, raw):
+        """Build from ``GeminiQueryParser`` output (or its cached JSON)."""
+        raw = raw or {}
+        min_minutes, max_minutes = parse_duration_filter(raw.get("duration"))
+        if _int_or_none(raw.get("min_duration")) is not None:
+            min_minutes = _int_or_none(raw.get("min_duration"))
+        if _int_or_none(raw.get("max_duration")) is not None:
+            max_minutes = _int_or_none(raw.get("max_duration"))
+        remote = raw.get("remote_testing")
+        return cls(
+            keywords=tuple(split_keywords(raw.get("keywords"))),
+            job_family=_known(raw.get("job_family"), "job_family"),
+            job_level=_clean(raw.get("job_level")),
+            industry=_known(raw.get("industry"), "industry"),
+            language=_clean(raw.get("language")),
+            test_types=TestType.parse(raw.get("test_type")),
+            remote=None if remote in (None, "") else str(remote).lower() in _TRUE,
+            min_minutes=min_minutes,
+            max_minutes=max_minutes,
+            duration=_clean(raw.get("duration")),
+            notes=_clean(raw.get("notes")),
+        )
+
+    def to_dict(self):
+        """The parser-shaped JSON sent to clients and kept in the shared cache."""
+        data = {}
+        if self.keywords:
+            data["keywords"] = ", ".join(self.keywords)
+        for name in ("job_family", "job_level", "industry", "language", "duration", "notes"):
+            value = getattr(self, name)
+            if value:
+                data[name] = value
+        if self.test_types:
+            data["test_type"] = self.test_types.letters
+        if self.remote is not None:
+            data["remote_testing"] = "Yes" if self.remote else "No"
+        if self.min_minutes is not None:
+            data["min_duration"] = self.min_minutes
+        if self.max_minutes is not None:
+            data["max_duration"] = self.max_minutes
+        return data
+
+    def replace(self, **changes):
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return Filters(**values)
+
+    def _values(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __bool__(self):
+        """True when the parser extracted anything; ``remote=False`` and 0 minutes count."""
+        if self.keywords or self.test_types:
+            return True
+        return any(
+            getattr(self, name) is not None
+            for name in self.__slots__
+            if name not in ("keywords", "test_types")
+        )
+
+    def __eq__(self, other):
+        return isinstance(other, Filters) and self._values() == other._values()
+
+    def __hash__(self):
+        return hash(self._values())
+
+    def __repr__(self):
+        return f"Filters({self.to_dict()!r})"
+
@@ -0,0 +1,111 @@
+import cProfile
+import logging
+import os
+import random
+import sys
+import threading
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+PROFILE_ADMIN_TOKEN = os.getenv("PROFILE_ADMIN_TOKEN")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sampling")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.001"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+TOKEN_HEADER = "X-Profile-Token"
+MODE_HEADER = "X-Profile-Mode"
+ID_HEADER = "X-Profile-Id"
+
+
+class SamplingProfiler:
+    """Periodically snapshot one thread's stack and count identical stacks.
+
+    The output is in "folded" format (``frame;frame;frame count`` per line),
+    which flamegraph.pl, speedscope and inferno read directly.
+    """
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def should_profile(headers):
+    """Cheap gate evaluated on every request: admin header first, then sampling."""
+    token = headers.get(TOKEN_HEADER)
+    if token is not None:
+        return bool(PROFILE_ADMIN_TOKEN) and token == PROFILE_ADMIN_TOKEN
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+@contextmanager
+def profile_request(request, headers):
+    """Profile the enclosed block when the request opts in.
+
+    The profile is written to ``PROFILE_DIR`` as ``<id>.folded`` (sampling) or
+    ``<id>.prof`` (deterministic, cProfile) and ``<id>`` is added to the
+    response ``headers`` mapping as ``X-Profile-Id``. When profiling is off
+    this costs a header lookup.
+    """
+    if not should_profile(request.headers):
+        yield None
+        return
+
+    profile_id = uuid.uuid4().hex[:16]
+    mode = request.headers.get(MODE_HEADER, PROFILE_MODE)
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+
+    if mode == "deterministic":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        profiler = SamplingProfiler(threading.get_ident())
+        profiler.start()
+
+    try:
+        yield profile_id
+    finally:
+        if mode == "deterministic":
+            profiler.disable()
+            path = os.path.join(PROFILE_DIR, f"{profile_id}.prof")
+            profiler.dump_stats(path)
+        else:
+            profiler.stop()
+            path = os.path.join(PROFILE_DIR, f"{profile_id}.folded")
+            profiler.write(path)
+        headers[ID_HEADER] = profile_id
+        logger.info(f"Saved request profile {path}")
@@ -0,0 +1,151 @@
+import datetime
+import logging
+import threading
+import time
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def count_tokens(text):
+    """Rough token estimate (~4 characters per token) used for accounting."""
+    return max(1, len(text) // 4)
+
+
+class GeminiBackend:
+    """Gemini explicit context caching: upload the prefix once, reference it by handle."""
+
+    def __init__(self, model_factory):
+        self._model_factory = model_factory
+
+    def create(self, context, ttl):
+        from google.generativeai import caching
+
+        model = self._model_factory()
+        return caching.CachedContent.create(
+            model=model.model_name,
+            display_name="shl-assessment-catalog",
+            contents=[context],
+            ttl=datetime.timedelta(seconds=ttl),
+        )
+
+    def renew(self, handle, ttl):
+        handle.update(ttl=datetime.timedelta(seconds=ttl))
+
+    def delete(self, handle):
+        handle.delete()
+
+    def generate(self, handle, prompt):
+        import google.generativeai as genai
+
+        model = genai.GenerativeModel.from_cached_content(cached_content=handle)
+        response = model.generate_content(prompt)
+        return response.text if hasattr(response, "text") else str(response)
+
+    def generate_plain(self, prompt):
+        response = self._model_factory().generate_content(prompt)
+        return response.text if hasattr(response, "text") else str(response)
+
+
+class RecordingBackend:
+    """Local stand-in for Gemini that records how many prompt tokens each call sends.
+
+    A cached context is counted once, when it is uploaded; later calls that
+    reference it only add their own prompt.
+    """
+
+    def __init__(self, response_text='{"recommended_assessments": []}'):
+        self.response_text = response_text
+        self.prompt_tokens = 0
+        self.contexts_created = 0
+        self.calls = 0
+
+    def create(self, context, ttl):
+        self.contexts_created += 1
+        self.prompt_tokens += count_tokens(context)
+        return {"id": self.contexts_created, "tokens": count_tokens(context)}
+
+    def renew(self, handle, ttl):
+        pass
+
+    def delete(self, handle):
+        pass
+
+    def generate(self, handle, prompt):
+        self.calls += 1
+        self.prompt_tokens += count_tokens(prompt)
+        return self.response_text
+
+    def generate_plain(self, prompt):
+        self.calls += 1
+        self.prompt_tokens += count_tokens(prompt)
+        return self.response_text
+
+
+class CatalogContextCache:
+    """Keeps one cached-context handle for the current catalog snapshot.
+
+    The handle is created lazily for a snapshot version, its TTL is extended
+    when it gets within ``renew_margin`` seconds of expiry, and ``invalidate``
+    (subscribed to catalog swaps) deletes it. If the backend refuses to create
+    a context (e.g. the catalog is below the provider's minimum cacheable
+    size) callers fall back to plain prompts for ``retry_after`` seconds.
+    """
+
+    def __init__(self, backend, build_context, ttl=3600, renew_margin=300, retry_after=600):
+        self.backend = backend
+        self.build_context = build_context
+        self.ttl = ttl
+        self.renew_margin = renew_margin
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._handle = None
+        self._version = None
+        self._expires_at = 0.0
+        self._disabled_until = 0.0
+
+    def handle_for(self, snapshot):
+        with self._lock:
+            now = time.time()
+            if self._handle is not None and self._version == snapshot.version:
+                if self._expires_at - now > self.renew_margin:
+                    return self._handle
+                try:
+                    self.backend.renew(self._handle, self.ttl)
+                    self._expires_at = now + self.ttl
+                    return self._handle
+                except Exception as e:
+                    logger.warning(f"Could not renew cached catalog context: {str(e)}")
+
+            self._drop()
+            if now < self._disabled_until:
+                return None
+
+            try:
+                handle = self.backend.create(self.build_context(snapshot.records), self.ttl)
+            except Exception as e:
+                logger.warning(f"Cached catalog context unavailable, using plain prompts: {str(e)}")
+                self._disabled_until = now + self.retry_after
+                return None
+
+            self._handle = handle
+            self._version = snapshot.version
+            self._expires_at = now + self.ttl
+            logger.info(f"Created cached catalog context for snapshot {snapshot.version}")
+            return handle
+
+    def invalidate(self, *args):
+        with self._lock:
+            self._drop()
+            self._disabled_until = 0.0
+
+    def _drop(self):
+        if self._handle is not None:
+            try:
+                self.backend.delete(self._handle)
+            except Exception as e:
+                logger.warning(f"Could not delete cached catalog context: {str(e)}")
+        self._handle = None
+        self._version = None
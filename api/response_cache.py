@@ -0,0 +1,27 @@
+import hashlib
+import json
+import os
+
+from api.shared_cache import shared_cache
+
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+FILTERS_CACHE_TTL = int(os.getenv("FILTERS_CACHE_TTL", "86400"))
+PAGES_CACHE_TTL = int(os.getenv("PAGES_CACHE_TTL", "86400"))
+
+
+def recommendation_key(query_text, k, fields, catalog_version):
+    """Cache key for a /recommend response: whitespace-normalized query plus options."""
+    normalized = " ".join(query_text.split())
+    payload = json.dumps([normalized, k, sorted(fields) if fields else None, catalog_version])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def text_key(text):
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+# Shared by every worker process on the host. Keys embed the catalog version,
+# so entries for an old catalog simply stop being hit and age out.
+recommendation_cache = shared_cache.namespace("recommendations", RESPONSE_CACHE_TTL)
+filters_cache = shared_cache.namespace("filters", FILTERS_CACHE_TTL)
+pages_cache = shared_cache.namespace("pages", PAGES_CACHE_TTL)
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import random
+from itertools import permutations
+
+from api.metrics import metrics
+from api.shared_cache import shared_cache
+
+SEARCH_HISTORY_TTL = int(os.getenv("SEARCH_HISTORY_TTL", str(30 * 86400)))
+# A keyword search is skipped only after its results were a subset of another
+# keyword's this many times, with no counterexample.
+SUBSET_MIN_OBSERVATIONS = int(os.getenv("SEARCH_SUBSET_MIN_OBSERVATIONS", "3"))
+# Fraction of covered keywords searched anyway, so a wrong verdict gets corrected.
+SEARCH_REPROBE_RATE = float(os.getenv("SEARCH_REPROBE_RATE", "0.05"))
+
+# Filters other than the keyword that change what a search returns.
+BASE_FILTERS = ("job_family", "job_level", "industry", "language")
+
+search_history = shared_cache.namespace("search_history", SEARCH_HISTORY_TTL)
+
+
+def normalize_keyword(keyword):
+    return " ".join(keyword.lower().split())
+
+
+def split_keywords(keywords_text):
+    """Comma-separated keywords, normalized, without blanks or repeats."""
+    keywords = (normalize_keyword(k) for k in (keywords_text or "").split(","))
+    return list(dict.fromkeys(k for k in keywords if k))
+
+
+def _pair_key(filters, keyword, other):
+    from api.catalog import get_snapshot
+
+    # Search results can change with the catalog, so each version learns afresh.
+    base = [getattr(filters, name) for name in BASE_FILTERS]
+    payload = [base, keyword, other, get_snapshot().version]
+    return hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+
+
+def _is_covered(filters, keyword, other):
+    observed = search_history.get(_pair_key(filters, keyword, other))
+    return (
+        bool(observed)
+        and observed["violations"] == 0
+        and observed["subset"] >= SUBSET_MIN_OBSERVATIONS
+    )
+
+
+def plan_keywords(filters):
+    """Return the keywords worth searching for ``filters``.
+
+    A keyword is dropped when past searches with the same other filters and
+    catalog version always returned a subset of another planned keyword's
+    results. A ``SEARCH_REPROBE_RATE`` share of those is searched anyway, so a
+    keyword that stopped being covered is seen to.
+    """
+    keywords = list(filters.keywords)
+    planned = []
+    for i, keyword in enumerate(keywords):
+        # Only a keyword that is kept (already planned, or still to be decided)
+        # can stand in for another, so mutually covering keywords keep one.
+        candidates = planned + keywords[i + 1 :]
+        if any(_is_covered(filters, keyword, other) for other in candidates):
+            if random.random() < SEARCH_REPROBE_RATE:
+                metrics.increment("search_reprobes_total")
+                planned.append(keyword)
+                continue
+            metrics.increment("search_requests_skipped_total")
+        else:
+            planned.append(keyword)
+    return planned
+
+
+def record_search_results(filters, results, fetched=None):
+    """Learn subset relations between the keyword searches that just ran.
+
+    ``results`` maps each keyword to the rows its search returned. Empty
+    results are ignored since they are as likely to be a failed fetch.
+    ``fetched`` names the keywords whose rows came from shl.com rather than
+    the pages cache (default: all); a pair counts as an observation only
+    when at least one side is fresh, so re-reading cached pages proves nothing.
+    """
+    url_sets = {
+        keyword: {row["url"] for row in rows}
+        for keyword, rows in results.items()
+        if keyword is not None and rows
+    }
+    for keyword, other in permutations(url_sets, 2):
+        if fetched is not None and keyword not in fetched and other not in fetched:
+            continue
+        key = _pair_key(filters, keyword, other)
+        observed = search_history.get(key) or {"subset": 0, "violations": 0}
+        if url_sets[keyword] <= url_sets[other]:
+            observed["subset"] += 1
+        else:
+            observed["violations"] += 1
+        search_history.set(key, observed)
+
+
+def merge_search_results(results):
+    """Merge per-keyword results into one row per URL, most matching searches first.
+
+    Each row carries ``keywords`` (which searches returned it) and ``hits``.
+    """
+    merged = {}
+    for keyword, rows in results.items():
+        for url in dict.fromkeys(row["url"] for row in rows):
+            entry = merged.setdefault(url, {"url": url, "keywords": [], "hits": 0})
+            if keyword is not None and keyword not in entry["keywords"]:
+                entry["keywords"].append(keyword)
+            entry["hits"] += 1
+    # Stable sort: ties keep the order the searches returned them in.
+    return sorted(merged.values(), key=lambda entry: -entry["hits"])
+
+
+def search_hits(rows):
+    """``{url: hits}`` for results returned by more than one search, as a ranking hint."""
+    return {row["url"]: row["hits"] for row in rows if row.get("hits", 1) > 1}
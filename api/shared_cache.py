@@ -0,0 +1,301 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+from api.metrics import metrics
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+SHARED_CACHE_PATH = os.getenv("SHARED_CACHE_PATH", "shared_cache.sqlite3")
+SHARED_CACHE_MAX_BYTES = int(os.getenv("SHARED_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# How long a worker may hold a fill lock before others assume it died.
+SHARED_CACHE_LOCK_TTL = float(os.getenv("SHARED_CACHE_LOCK_TTL", "120"))
+# How long a worker waits for another one to fill an entry before computing it itself.
+SHARED_CACHE_LOCK_WAIT = float(os.getenv("SHARED_CACHE_LOCK_WAIT", "60"))
+EVICT_EVERY = 64
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS locks (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+"""
+
+
+class SharedCache:
+    """JSON values in a SQLite database (WAL mode) shared by every worker process on the host.
+
+    Entries live in namespaces, expire after a per-entry TTL and are evicted
+    least recently used first once the values exceed ``max_bytes``. ``filling``
+    adds a cross-process lock so that when an entry is missing only one
+    worker computes it and the others wait for its result.
+
+    Cache errors are logged and treated as misses; the cache never fails a
+    request.
+    """
+
+    def __init__(
+        self,
+        path=SHARED_CACHE_PATH,
+        max_bytes=SHARED_CACHE_MAX_BYTES,
+        lock_ttl=SHARED_CACHE_LOCK_TTL,
+        lock_wait=SHARED_CACHE_LOCK_WAIT,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock_ttl = lock_ttl
+        self.lock_wait = lock_wait
+        self._local = threading.local()
+        self._writes = 0
+
+    def _conn(self):
+        # Connections are per thread and must not survive a fork.
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get(self, namespace, key):
+        value = self._read(namespace, key)
+        outcome = "misses" if value is None else "hits"
+        metrics.increment(f"shared_cache_{namespace}_{outcome}_total")
+        return value
+
+    def _read(self, namespace, key):
+        try:
+            now = time.time()
+            conn = self._conn()
+            row = conn.execute(
+                "SELECT value, expires_at, accessed_at FROM entries WHERE namespace = ? AND key = ?",
+                (namespace, key),
+            ).fetchone()
+            if row is None or row[1] < now:
+                return None
+            # Recency only needs to be approximate; skip the write on hot keys.
+            if now - row[2] > 60:
+                conn.execute(
+                    "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                    (now, namespace, key),
+                )
+            return json.loads(row[0])
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache read failed: {str(e)}")
+            return None
+
+    def set(self, namespace, key, value, ttl):
+        try:
+            data = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+            now = time.time()
+            self._conn().execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, data, len(data), now + ttl, now),
+            )
+            self._writes += 1
+            if self._writes % EVICT_EVERY == 0:
+                self.evict()
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache write failed: {str(e)}")
+
+    def items(self, namespace):
+        """All live ``(key, value)`` pairs of ``namespace``; meant for small namespaces."""
+        try:
+            rows = self._conn().execute(
+                "SELECT key, value FROM entries WHERE namespace = ? AND expires_at >= ?",
+                (namespace, time.time()),
+            ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache read failed: {str(e)}")
+            return []
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def clear(self, namespace=None):
+        with self._transaction() as conn:
+            if namespace is None:
+                conn.execute("DELETE FROM entries")
+            else:
+                conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+
+    def evict(self):
+        """Drop expired entries, then the least recently used until under ``max_bytes``."""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM entries WHERE expires_at < ?", (time.time(),))
+            conn.execute("DELETE FROM locks WHERE expires_at < ?", (time.time(),))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            # Evict down to 90% so the next few writes don't trigger another pass.
+            excess = total - int(self.max_bytes * 0.9)
+            victims = []
+            for namespace, key, size in conn.execute(
+                "SELECT namespace, key, size FROM entries ORDER BY accessed_at"
+            ):
+                victims.append((namespace, key))
+                excess -= size
+                if excess <= 0:
+                    break
+            conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?", victims)
+        metrics.increment("shared_cache_evictions_total", len(victims))
+
+    def _lock(self, namespace, key, ttl):
+        """Try to take the fill lock; returns an owner token, or ``None`` if another worker holds it."""
+        token = uuid.uuid4().hex
+        now = time.time()
+        try:
+            with self._transaction() as conn:
+                row = conn.execute(
+                    "SELECT expires_at FROM locks WHERE namespace = ? AND key = ?",
+                    (namespace, key),
+                ).fetchone()
+                if row is not None and row[0] > now:
+                    return None
+                conn.execute(
+                    "INSERT OR REPLACE INTO locks VALUES (?, ?, ?, ?)",
+                    (namespace, key, token, now + ttl),
+                )
+            return token
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache lock failed: {str(e)}")
+            return ""
+
+    def _unlock(self, namespace, key, token):
+        try:
+            self._conn().execute(
+                "DELETE FROM locks WHERE namespace = ? AND key = ? AND owner = ?",
+                (namespace, key, token),
+            )
+        except sqlite3.Error as e:
+            logger.warning(f"Shared cache unlock failed: {str(e)}")
+
+    def _wait_for_fill(self, namespace, key, wait, lock_ttl):
+        """Return ``(value, token)``: the cached value, or the fill lock to compute it under."""
+        value = self.get(namespace, key)
+        if value is not None:
+            return value, None
+
+        deadline = time.monotonic() + (self.lock_wait if wait is None else wait)
+        delay = 0.05
+        waited = False
+        while True:
+            token = self._lock(namespace, key, lock_ttl or self.lock_ttl)
+            if token is not None:
+                # The previous holder may have stored the value just before unlocking.
+                value = self._read(namespace, key) if waited else None
+                if value is not None:
+                    self._unlock(namespace, key, token)
+                    return value, None
+                return None, token
+            if not waited:
+                metrics.increment(f"shared_cache_{namespace}_lock_waits_total")
+                waited = True
+            if time.monotonic() >= deadline:
+                logger.warning(f"Gave up waiting for {namespace} entry; computing it anyway")
+                return None, None
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+            value = self._read(namespace, key)
+            if value is not None:
+                return value, None
+
+    @contextmanager
+    def filling(self, namespace, key, wait=None, lock_ttl=None):
+        """Yield the cached value, or ``None`` while holding the lock to compute it.
+
+        When another worker is already computing the entry this waits (up to
+        ``wait`` seconds) for its result instead of starting a duplicate.
+        The caller stores what it computed with ``set`` inside the block;
+        ``lock_ttl`` should exceed how long that computation can take.
+        """
+        value, token = self._wait_for_fill(namespace, key, wait, lock_ttl)
+        try:
+            yield value
+        finally:
+            if token:
+                self._unlock(namespace, key, token)
+
+    def get_or_set(self, namespace, key, compute, ttl, wait=None, lock_ttl=None):
+        """Return the cached value or compute and store it; empty results are not stored."""
+        with self.filling(namespace, key, wait, lock_ttl) as value:
+            if value is None:
+                value = compute()
+                if value:
+                    self.set(namespace, key, value, ttl)
+            return value
+
+    def namespace(self, name, ttl):
+        return CacheNamespace(self, name, ttl)
+
+
+class CacheNamespace:
+    """One namespace of a ``SharedCache`` with a fixed TTL."""
+
+    def __init__(self, cache, name, ttl):
+        self.cache = cache
+        self.name = name
+        self.ttl = ttl
+
+    def get(self, key):
+        return self.cache.get(self.name, key)
+
+    def set(self, key, value):
+        self.cache.set(self.name, key, value, self.ttl)
+
+    def items(self):
+        return self.cache.items(self.name)
+
+    def filling(self, key, wait=None, lock_ttl=None):
+        return self.cache.filling(self.name, key, wait, lock_ttl)
+
+    def get_or_set(self, key, compute, wait=None, lock_ttl=None):
+        return self.cache.get_or_set(self.name, key, compute, self.ttl, wait, lock_ttl)
+
+    def clear(self, *args):
+        self.cache.clear(self.name)
+
+
+def write_file_atomic(path, text):
+    """Replace ``path`` with ``text`` so concurrent workers never see a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+# Opened lazily by the first thread that uses it.
+shared_cache = SharedCache()
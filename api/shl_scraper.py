@@ -1,10 +1,17 @@
-import requests
-from bs4 import BeautifulSoup
 import logging
+import os
+import threading
 import time
+from contextlib import contextmanager
 from urllib.parse import urljoin
 import json
 
+from api.cache_warming import record_traffic
+from api.metrics import metrics
+from api.response_cache import pages_cache
+from api.search_planner import merge_search_results, plan_keywords, record_search_results
+from api.traffic_capture import record_upstream
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
@@ -13,6 +20,16 @@ logger = logging.getLogger(__name__)
 
 BASE_URL = "https://www.shl.com/products/product-catalog/"
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+REQUEST_HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+
+# Listing ``type`` values: 1 = individual test solutions, 2 = pre-packaged job solutions.
+CATALOG_TYPES = (1, 2)
 
 SHL_FILTER_IDS = {
     "job_family": {
@@ -96,32 +113,90 @@ SHL_FILTER_IDS = {
     }
 }
 
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Pooled HTTP session shared by every scraper call, created on first use.
+
+    ``requests`` and BeautifulSoup are imported lazily so importing the API
+    does not pay for them before the warm-up phase.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                session.headers.update(REQUEST_HEADERS)
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+_warming = threading.local()
+
+
+@contextmanager
+def warming_requests():
+    """Count the upstream requests made inside the block as cache warming, not live traffic."""
+    previous = getattr(_warming, "active", False)
+    _warming.active = True
+    try:
+        yield
+    finally:
+        _warming.active = previous
+
+
+def _count_request():
+    if getattr(_warming, "active", False):
+        metrics.increment("warming_requests_total")
+    else:
+        metrics.increment("outbound_requests_total")
+
+
+def _soup(html):
+    from bs4 import BeautifulSoup
+
+    return BeautifulSoup(html, 'html.parser')
+
+
+def plan_search_urls(filters):
+    """Return ``(keyword, url)`` for each search worth issuing for ``filters``."""
+    keywords = plan_keywords(filters)
+    if not keywords:
+        return [(None, build_single_search_url(filters))]
+
+    searches = {}
+    for keyword in keywords:
+        searches.setdefault(build_single_search_url(filters, keyword), keyword)
+    return [(keyword, url) for url, keyword in searches.items()]
+
 def build_search_url(filters):
     urls = []
     
-    if "keywords" in filters and filters["keywords"]:
-        keywords = [k.strip() for k in filters["keywords"].split(",")]
-        for keyword in keywords:
-            keyword_filters = filters.copy()
-            keyword_filters["keyword"] = keyword
-            url = build_single_search_url(keyword_filters)
+    for keyword, url in plan_search_urls(filters):
+        if keyword is not None:
             with open("all_urls.txt", "a") as f:
                 f.write("\n"+url)                    
-            urls.append(url)
-    else:
-        urls.append(build_single_search_url(filters))
+        urls.append(url)
     return urls
 
-def build_single_search_url(filters):
+def build_single_search_url(filters, keyword=None):
     params = []
-    if "keyword" in filters and filters["keyword"]:
-        keyword = filters["keyword"].replace(" ", "+")
+    if keyword:
+        keyword = keyword.replace(" ", "+")
         params.append(f"keyword={keyword}")
         params.append("action_doFilteringForm=Search")
     
     for key in ["job_family", "job_level", "industry", "language"]:
-        if key in filters and filters[key]:
-            value = filters[key]
+        value = getattr(filters, key)
+        if value:
             id_map = SHL_FILTER_IDS.get(key, {})
             if value in id_map:
                 params.append(f"{key}={id_map[value]}")
@@ -151,126 +226,198 @@ def parse_duration(duration_text):
     except (ValueError, TypeError):
         return 0
 
-def fetch_assessments(filters, max_retries=3, retry_delay=2):
-    urls = build_search_url(filters)  #
-    all_assessments = []
+def parse_listing_page(html):
+    """Extract assessment detail URLs from a catalog listing or search page."""
+    soup = _soup(html)
+    assessments = []
 
-    headers = {
-        "User-Agent": USER_AGENT,
-        "Accept": "text/html,application/xhtml+xml,application/xml",
-        "Accept-Language": "en-US,en;q=0.9",
-    }
+    table_responsive_list = soup.find_all('div', class_='custom__table-responsive')
 
-    for url in urls:
-        logger.info(f"Fetching SHL assessments from URL: {url}")
-        assessments_from_url = []
+    for table_responsive in table_responsive_list:
+        table = table_responsive.find('table')
+        if not table:
+            logger.warning("Could not find table inside a responsive div.")
+            continue
 
-        for attempt in range(max_retries):
+        for row in table.find_all('tr')[1:]:  
             try:
-                response = requests.get(url, headers=headers, timeout=10)
-                response.raise_for_status()
-                
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                table_responsive_list = soup.find_all('div', class_='custom__table-responsive')
-                
-                for table_responsive in table_responsive_list:
-                    table = table_responsive.find('table')
-                    if not table:
-                        logger.warning("Could not find table inside a responsive div.")
-                        continue
-
-                    for row in table.find_all('tr')[1:]:  
-                        try:
-                            cells = row.find_all('td')
-                            if len(cells) < 4:
-                                continue
-
-                            title_cell = cells[0]
-                            link = title_cell.find('a')
-                            if not link or not link.has_attr('href'):
-                                continue
-
-                            relative_url = link['href']
-                            full_url = urljoin(BASE_URL, relative_url)
-
-                        
-                            assessment = {
-                                'url': full_url,
-                            }
-
-                            assessments_from_url.append(assessment)
-
-                        except Exception as e:
-                            logger.error(f"Error processing row: {str(e)}")
-                            continue
-                
-            except requests.RequestException as e:
-                logger.warning(f"Attempt {attempt+1}/{max_retries} failed for {url}: {str(e)}")
-                if attempt < max_retries - 1:
-                    time.sleep(retry_delay)
-                else:
-                    logger.error(f"Failed to fetch SHL page after {max_retries} attempts: {url}")
-        
-        all_assessments.extend(assessments_from_url)
-    return all_assessments
+                cells = row.find_all('td')
+                if len(cells) < 4:
+                    continue
 
+                title_cell = cells[0]
+                link = title_cell.find('a')
+                if not link or not link.has_attr('href'):
+                    continue
 
-def get_assessment_details(assessment_url):
-    headers = {
-        "User-Agent": USER_AGENT,
-        "Accept": "text/html,application/xhtml+xml,application/xml",
-        "Accept-Language": "en-US,en;q=0.9",
-    }
+                relative_url = link['href']
+                full_url = urljoin(BASE_URL, relative_url)
 
-    try:
-        response = requests.get(assessment_url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
+                assessments.append({'url': full_url})
 
-        details = {'url': assessment_url}
+            except Exception as e:
+                logger.error(f"Error processing row: {str(e)}")
+                continue
 
-        rows = soup.select('.product-catalogue-training-calendar__row')
+    return assessments
 
-        for row in rows:
-            heading = row.find('h4')
-            content = row.find('p')
-            if not heading or not content:
-                continue
+def _fetch_listing(url, max_retries=3, retry_delay=2):
+    import requests
+
+    logger.info(f"Fetching SHL assessments from URL: {url}")
+
+    for attempt in range(max_retries):
+        try:
+            _count_request()
+            response = get_session().get(url, headers=REQUEST_HEADERS, timeout=10)
+            response.raise_for_status()
+            
+            return parse_listing_page(response.text)
+            
+        except requests.RequestException as e:
+            logger.warning(f"Attempt {attempt+1}/{max_retries} failed for {url}: {str(e)}")
+            if attempt < max_retries - 1:
+                time.sleep(retry_delay)
+            else:
+                logger.error(f"Failed to fetch SHL page after {max_retries} attempts: {url}")
 
-            title = heading.get_text(strip=True).lower()
-            value = content.get_text(strip=True)
+    return []
 
-            if 'description' in title:
-                details['description'] = value
-            elif 'job level' in title:
-                details['job_levels'] = [lvl.strip() for lvl in value.split(',') if lvl.strip()]
-            elif 'language' in title:
-                details['languages'] = [lang.strip() for lang in value.split(',') if lang.strip()]
-            elif 'assessment length' in title:
-                details['assessment_time'] = value
+def fetch_assessments(filters, max_retries=3, retry_delay=2):
+    """Run the planned searches for ``filters`` and merge their results.
+
+    Returns one ``{'url', 'keywords', 'hits'}`` dict per assessment, where
+    ``keywords`` are the searches that returned it, most hits first.
+    """
+    results = {}
+    fetched = set()
+    searches = plan_search_urls(filters)
+    record_traffic(filters, [url for _, url in searches])
+
+    def fetch(keyword, url):
+        fetched.add(keyword)
+        return _fetch_listing(url, max_retries, retry_delay)
+
+    for keyword, url in searches:
+        start = time.perf_counter()
+        # Search pages are shared across worker processes; a failed fetch is not cached.
+        results[keyword] = pages_cache.get_or_set(url, lambda: fetch(keyword, url))
+        record_upstream("searches", url, results[keyword], time.perf_counter() - start)
+
+    record_search_results(filters, results, fetched)
+    return merge_search_results(results)
+
+def iter_catalog_listing_urls(page_size=12, max_pages=60, max_retries=3, retry_delay=2):
+    """Yield every detail URL in the public catalog by walking its paginated listing.
+
+    A listing page that still fails after ``max_retries`` attempts raises the
+    last ``requests.RequestException``: a partial crawl must not be mistaken
+    for a smaller catalog.
+    """
+    import requests
+
+    for catalog_type in CATALOG_TYPES:
+        for page in range(max_pages):
+            url = f"{BASE_URL}?start={page * page_size}&type={catalog_type}"
+            for attempt in range(max_retries):
+                try:
+                    response = get_session().get(url, headers=REQUEST_HEADERS, timeout=10)
+                    response.raise_for_status()
+                    break
+                except requests.RequestException as e:
+                    logger.warning(
+                        f"Attempt {attempt+1}/{max_retries} failed for catalog listing {url}: {str(e)}"
+                    )
+                    if attempt == max_retries - 1:
+                        raise
+                    time.sleep(retry_delay)
 
-        test_type_span = soup.select_one('.product-catalogue__key')
-        if test_type_span:
-            details['test_type'] = test_type_span.get_text(strip=True)
+            rows = parse_listing_page(response.text)
+            if not rows:
+                break
+            for row in rows:
+                yield row['url']
+
+def fetch_page(url, etag=None, timeout=10):
+    """Conditionally GET a page.
+
+    Returns ``(status_code, body, etag)``; ``body`` is the raw response bytes,
+    or ``None`` when the server answers ``304 Not Modified`` for the supplied
+    ``etag``.
+    """
+    headers = dict(REQUEST_HEADERS)
+    if etag:
+        headers["If-None-Match"] = etag
+
+    response = get_session().get(url, headers=headers, timeout=timeout)
+    if response.status_code == 304:
+        return 304, None, etag
+    response.raise_for_status()
+    return response.status_code, response.content, response.headers.get("ETag")
+
+
+def parse_assessment_details(html, assessment_url):
+    """Extract a detail record from the HTML (``str`` or raw ``bytes``) of an assessment page."""
+    soup = _soup(html)
+
+    details = {'url': assessment_url}
+
+    rows = soup.select('.product-catalogue-training-calendar__row')
+
+    for row in rows:
+        heading = row.find('h4')
+        content = row.find('p')
+        if not heading or not content:
+            continue
+
+        title = heading.get_text(strip=True).lower()
+        value = content.get_text(strip=True)
+
+        if 'description' in title:
+            details['description'] = value
+        elif 'job level' in title:
+            details['job_levels'] = [lvl.strip() for lvl in value.split(',') if lvl.strip()]
+        elif 'language' in title:
+            details['languages'] = [lang.strip() for lang in value.split(',') if lang.strip()]
+        elif 'assessment length' in title:
+            details['assessment_time'] = value
+
+    test_type_span = soup.select_one('.product-catalogue__key')
+    if test_type_span:
+        details['test_type'] = test_type_span.get_text(strip=True)
+
+    remote_text_container = soup.find('p', string=lambda t: t and "Remote Testing" in t)
+    if remote_text_container and remote_text_container.find('span', class_='catalogue__circle -yes'):
+        details['remote_testing'] = 'Yes'
+    else:
+        details['remote_testing'] = 'No'
 
-        remote_text_container = soup.find('p', string=lambda t: t and "Remote Testing" in t)
-        if remote_text_container and remote_text_container.find('span', class_='catalogue__circle -yes'):
-            details['remote_testing'] = 'Yes'
-        else:
-            details['remote_testing'] = 'No'
+    return details
 
-        return details
+def _fetch_assessment_details(assessment_url):
+    try:
+        _count_request()
+        response = get_session().get(assessment_url, headers=REQUEST_HEADERS, timeout=10)
+        response.raise_for_status()
+        return parse_assessment_details(response.text, assessment_url)
 
     except Exception as e:
         logger.error(f"Error fetching assessment details: {str(e)}")
         return {}
 
+def get_assessment_details(assessment_url):
+    start = time.perf_counter()
+    details = pages_cache.get_or_set(
+        assessment_url, lambda: _fetch_assessment_details(assessment_url)
+    )
+    record_upstream("details", assessment_url, details, time.perf_counter() - start)
+    return details
+
 def save_assessments(assessment_urls, output_file='assessments_data.json'):
     all_data = []
 
-    for url_dict in assessment_urls:
-        data = get_assessment_details(url_dict['url'])
+    for url in dict.fromkeys(url_dict['url'] for url_dict in assessment_urls):
+        data = get_assessment_details(url)
         if data:
             all_data.append(data)
 
@@ -0,0 +1,101 @@
+import contextvars
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from api.catalog import resolve_assessments
+from api.facets import query_from_filters
+from api.gemini_recommender import get_top_assessments_with_gemini
+from api.metrics import metrics
+from api.search_planner import search_hits
+from api.shl_scraper import fetch_assessments
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+SPECULATIVE_RANKING = os.getenv("SPECULATIVE_RANKING", "0") == "1"
+SPECULATION_WORKERS = int(os.getenv("SPECULATION_WORKERS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=SPECULATION_WORKERS, thread_name_prefix="speculate")
+
+
+def _timed_rank(query_text, k, candidates, fields):
+    start = time.perf_counter()
+    results = get_top_assessments_with_gemini(query_text, k=k, assessments=candidates, fields=fields)
+    return results, time.perf_counter() - start
+
+
+def rank_speculatively(query_text, filters, snapshot, k=10, fields=None):
+    """Rank against the snapshot while the live search runs, then reconcile.
+
+    Ranking starts immediately on the snapshot records that match the parsed
+    filters. Meanwhile the live search is fetched and resolved in this thread.
+    If it finds nothing the speculative candidates lacked, the speculative
+    ranking is returned as is; otherwise the speculative picks are merged with
+    the new candidates and re-ranked, which is a much smaller prompt than the
+    original candidate set.
+
+    Returns ``(results, candidate_count)``, or ``None`` when the caller should
+    take the serial path: no facet filter applies (keywords alone would make
+    the whole catalog the candidate set) or no snapshot record matches.
+    """
+    if not query_from_filters(filters):
+        metrics.increment("speculation_skipped_total")
+        return None
+    speculative_candidates = snapshot.filter(filters)
+    if not speculative_candidates:
+        return None
+
+    start = time.perf_counter()
+    metrics.increment("speculation_attempts_total")
+    # The URL is always needed to reconcile with the live search.
+    speculative_fields = fields if not fields or "url" in fields else [*fields, "url"]
+    # The copied context carries the request's traffic recording into the worker.
+    future = _executor.submit(
+        contextvars.copy_context().run,
+        _timed_rank,
+        query_text,
+        k,
+        speculative_candidates,
+        speculative_fields,
+    )
+
+    search_results = fetch_assessments(filters)
+    fresh = resolve_assessments(search_results, snapshot)
+    fetch_time = time.perf_counter() - start
+
+    speculative_urls = {a["url"] for a in speculative_candidates}
+    new_candidates = [a for a in fresh if a["url"] not in speculative_urls]
+
+    results, rank_time = future.result()
+    if not new_candidates:
+        metrics.increment("speculation_wins_total")
+        saved = fetch_time + rank_time - (time.perf_counter() - start)
+        metrics.observe("speculation_latency_saved_seconds", max(0.0, saved))
+        return _project(results, fields), len(speculative_candidates)
+
+    metrics.increment("speculation_reranks_total")
+    logger.info(f"Live search added {len(new_candidates)} assessments; re-ranking")
+    picked = [
+        snapshot.get(r["url"])
+        for r in results.get("recommended_assessments", [])
+        if snapshot.get(r["url"]) is not None
+    ]
+    merged = picked + new_candidates
+    results = get_top_assessments_with_gemini(
+        query_text, k=k, assessments=merged, fields=fields, search_hits=search_hits(search_results)
+    )
+    return results, len(speculative_urls | {a["url"] for a in fresh})
+
+
+def _project(results, fields):
+    if not fields:
+        return results
+    return {
+        "recommended_assessments": [
+            {f: r[f] for f in fields if f in r} for r in results.get("recommended_assessments", [])
+        ]
+    }
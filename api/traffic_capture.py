@@ -0,0 +1,184 @@
+import contextvars
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Fraction of computed /recommend requests to record; cache hits are never recorded.
+TRAFFIC_CAPTURE_RATE = float(os.getenv("TRAFFIC_CAPTURE_RATE", "0"))
+TRAFFIC_CAPTURE_DIR = os.getenv("TRAFFIC_CAPTURE_DIR", "captures")
+# Key for the query hashes; shared by all workers so their recordings group together.
+TRAFFIC_CAPTURE_SECRET = os.getenv("TRAFFIC_CAPTURE_SECRET")
+
+if TRAFFIC_CAPTURE_SECRET:
+    _hash_key = TRAFFIC_CAPTURE_SECRET.encode("utf-8")
+else:
+    _hash_key = secrets.token_bytes(32)
+    if TRAFFIC_CAPTURE_RATE > 0:
+        logger.warning(
+            "TRAFFIC_CAPTURE_SECRET is not set; query hashes only group within this process"
+        )
+
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_URL = re.compile(r"https?://(?!(?:www\.)?shl\.com)\S+|www\.(?!shl\.com)\S+", re.IGNORECASE)
+_PHONE = re.compile(r"(?<!\w)\+?\d[\d\s().-]{7,}\d(?!\w)")
+
+_recording = contextvars.ContextVar("traffic_recording", default=None)
+_write_lock = threading.Lock()
+
+
+def anonymize(text):
+    """Replace e-mail addresses, phone numbers and non-SHL links in ``text``."""
+    text = _EMAIL.sub("<email>", text)
+    text = _URL.sub("<url>", text)
+    # Nine digits or more, so year ranges and salary figures survive.
+    return _PHONE.sub(
+        lambda m: "<phone>" if sum(c.isdigit() for c in m.group()) >= 9 else m.group(), text
+    )
+
+
+def _anonymize_values(data):
+    return {key: anonymize(value) if isinstance(value, str) else value for key, value in data.items()}
+
+
+class Recording:
+    """Everything one request saw: its input, upstream responses and output.
+
+    Upstream entries keep the seconds each call took so a replay can stand
+    in for shl.com and Gemini with the same latency. ``stages`` holds the
+    seconds from the start of the request to each pipeline stage.
+    """
+
+    def __init__(self, query, k, fields):
+        self.start = time.perf_counter()
+        self.data = {
+            "id": uuid.uuid4().hex[:16],
+            "captured_at": time.time(),
+            # Lets repeated queries be grouped without keeping the text. Keyed,
+            # so short queries can't be recovered by hashing guesses.
+            "query_hash": hmac.new(_hash_key, query.encode("utf-8"), hashlib.sha256).hexdigest(),
+            "query": anonymize(query),
+            "k": k,
+            "fields": fields,
+            "filters": None,
+            "searches": {},
+            "details": {},
+            "llm": {"parse": [], "ranking": []},
+            "stages": {},
+            "results": None,
+        }
+
+    def add(self, kind, key, value, seconds):
+        self.data[kind][key] = {"response": value, "seconds": seconds}
+
+    def stage(self, name, payload):
+        self.data["stages"][name] = time.perf_counter() - self.start
+        if name == "filters":
+            self.data["filters"] = _anonymize_values(payload)
+        elif name == "recommendations":
+            self.data["results"] = payload.get("recommendations")
+
+    def add_llm(self, kind, text, seconds):
+        # Model output can echo contact details from the query; replay parses
+        # the anonymized text, as it does the anonymized filters.
+        self.data["llm"][kind].append({"response": anonymize(text), "seconds": seconds})
+
+    def record(self, stages):
+        """Pass ``(stage, payload)`` events through, recording them and their upstream calls.
+
+        The recording is made current only while the pipeline runs up to its
+        next stage, and reset before that stage is handed on: a streaming
+        response may resume the generator in a different context, where a
+        token set across a ``yield`` could not be reset.
+        """
+        stages = iter(stages)
+        while True:
+            token = _recording.set(self)
+            try:
+                stage, payload = next(stages)
+            except StopIteration:
+                return
+            finally:
+                _recording.reset(token)
+            self.stage(stage, payload)
+            yield stage, payload
+
+
+def record_upstream(kind, key, value, seconds):
+    """Add an upstream response (``searches`` or ``details``) to the current recording."""
+    recording = _recording.get()
+    if recording is not None:
+        recording.add(kind, key, value, seconds)
+
+
+def record_llm(kind, text, seconds):
+    """Add a raw model output (``parse`` or ``ranking``) to the current recording."""
+    recording = _recording.get()
+    if recording is not None:
+        recording.add_llm(kind, text, seconds)
+
+
+def _capture_path():
+    return os.path.join(
+        TRAFFIC_CAPTURE_DIR, f"traffic-{time.strftime('%Y%m%d')}-{os.getpid()}.jsonl"
+    )
+
+
+@contextmanager
+def capture_request(query, k, fields, rate=None):
+    """Record the enclosed pipeline run for ``query`` when it is sampled.
+
+    Yields the ``Recording`` (or ``None`` when not sampled); the caller runs
+    the pipeline through ``Recording.record``. Upstream calls made while it
+    runs, including work handed to threads with a copied context, are added
+    by ``record_upstream`` and ``record_llm``. The recording is appended to a
+    JSON Lines file in ``TRAFFIC_CAPTURE_DIR`` once the request finishes.
+    """
+    rate = TRAFFIC_CAPTURE_RATE if rate is None else rate
+    if rate <= 0 or random.random() >= rate:
+        yield None
+        return
+
+    recording = Recording(query, k, fields)
+    try:
+        yield recording
+    finally:
+        if recording.data["results"] is not None:
+            try:
+                os.makedirs(TRAFFIC_CAPTURE_DIR, exist_ok=True)
+                line = json.dumps(recording.data, ensure_ascii=False) + "\n"
+                with _write_lock, open(_capture_path(), "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError as e:
+                logger.error(f"Failed to save traffic recording: {str(e)}")
+
+
+def load_recordings(paths):
+    """Read recordings from capture files or directories of them."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".jsonl")
+            )
+        else:
+            files.append(path)
+
+    recordings = []
+    for file in files:
+        with open(file, "r", encoding="utf-8") as f:
+            recordings.extend(json.loads(line) for line in f if line.strip())
+    return recordings
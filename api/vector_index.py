@@ -0,0 +1,403 @@
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+
+import numpy as np
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX = os.getenv("VECTOR_INDEX", "0") == "1"
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "vector_index")
+VECTOR_INDEX_DTYPE = os.getenv("VECTOR_INDEX_DTYPE", "float32")
+VECTOR_INDEX_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "8"))
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "256"))
+
+# Below this many vectors a flat scan is as fast as probing lists.
+TRAIN_THRESHOLD = 1024
+# Re-cluster once the index has grown this much since the last training.
+RETRAIN_GROWTH = 4
+CHUNK_ROWS = 8192
+
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def _nearest(vectors, centroids):
+    """Index of the most similar centroid for every row, computed in chunks."""
+    out = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), CHUNK_ROWS):
+        block = np.asarray(vectors[start : start + CHUNK_ROWS], dtype=np.float32)
+        out[start : start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def kmeans(vectors, nlist, iterations=10, sample_per_list=64, seed=0):
+    """Spherical k-means on a sample of ``vectors``; returns ``nlist`` unit centroids."""
+    rng = np.random.default_rng(seed)
+    size = min(len(vectors), nlist * sample_per_list)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), size, replace=False))], np.float32)
+    centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+
+    for _ in range(iterations):
+        assign = _nearest(sample, centroids)
+        order = np.argsort(assign, kind="stable")
+        counts = np.bincount(assign, minlength=nlist)
+        filled = np.flatnonzero(counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+        centroids[filled] = np.add.reduceat(sample[order], starts, axis=0)
+        # Re-seed empty lists with random sample points.
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+        centroids = _normalize(centroids)
+    return centroids
+
+
+class VectorIndex:
+    """IVF (inverted file) index over unit-normalized embeddings, persisted under ``path``.
+
+    Vectors live in a memory-mapped ``.npy`` matrix, as float32 or as int8
+    with a per-row scale. The matrix grows by doubling, so inserts append in
+    place. Each row is assigned to its nearest k-means centroid, and a search
+    scores only the rows in the ``nprobe`` lists closest to the query. A
+    larger ``nprobe`` trades speed for recall; probing every list is exact.
+    Small indexes are scanned flat until ``TRAIN_THRESHOLD`` vectors.
+
+    Rows are keyed by string IDs. Re-adding an ID overwrites its row, and
+    removed rows are skipped by searches.
+    """
+
+    def __init__(self, path=VECTOR_INDEX_PATH, dim=None, dtype=VECTOR_INDEX_DTYPE):
+        if dtype not in ("float32", "int8"):
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        self.path = path
+        self._lock = threading.RLock()
+        self._meta_mtime = None
+        self.dim = dim
+        self.dtype = dtype
+        self.count = 0
+        self.capacity = 0
+        self.trained_count = 0
+        self.ids = []
+        self.hashes = []
+        self.row_of = {}
+        self.centroids = None
+        self._vectors = self._scales = self._lists = None
+        self._order = self._offsets = None
+        if os.path.exists(self._file("meta.json")):
+            self._load()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def __len__(self):
+        return int(np.count_nonzero(self._lists[: self.count] >= 0)) if self.count else 0
+
+    # -- persistence ---------------------------------------------------------
+
+    def _load(self):
+        meta_path = self._file("meta.json")
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        with open(self._file("ids.json"), "r", encoding="utf-8") as f:
+            entries = json.load(f)
+        self.dim, self.dtype = meta["dim"], meta["dtype"]
+        self.count, self.capacity = meta["count"], meta["capacity"]
+        self.trained_count = meta["trained_count"]
+        self.ids = [entry[0] for entry in entries]
+        self.hashes = [entry[1] for entry in entries]
+        self.row_of = {id_: row for row, id_ in enumerate(self.ids)}
+        self._open_arrays()
+        centroids_path = self._file("centroids.npy")
+        self.centroids = np.load(centroids_path) if os.path.exists(centroids_path) else None
+        self._order = self._offsets = None
+        self._meta_mtime = os.path.getmtime(meta_path)
+
+    def _open_arrays(self):
+        self._vectors = np.load(self._file("vectors.npy"), mmap_mode="r+")
+        self._lists = np.load(self._file("lists.npy"), mmap_mode="r+")
+        self._scales = (
+            np.load(self._file("scales.npy"), mmap_mode="r+") if self.dtype == "int8" else None
+        )
+
+    def _write_json(self, name, payload):
+        tmp_path = self._file(f"{name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, self._file(name))
+
+    def _save(self):
+        for array in (self._vectors, self._scales, self._lists):
+            if array is not None:
+                array.flush()
+        self._write_json("ids.json", [[i, h] for i, h in zip(self.ids, self.hashes)])
+        if self.centroids is not None:
+            tmp_path = self._file(f"centroids.{os.getpid()}.tmp.npy")
+            np.save(tmp_path, self.centroids)
+            os.replace(tmp_path, self._file("centroids.npy"))
+        # Written last: other processes reload when its mtime changes.
+        self._write_json(
+            "meta.json",
+            {
+                "dim": self.dim,
+                "dtype": self.dtype,
+                "count": self.count,
+                "capacity": self.capacity,
+                "trained_count": self.trained_count,
+            },
+        )
+        self._meta_mtime = os.path.getmtime(self._file("meta.json"))
+
+    def reload_if_changed(self):
+        """Pick up inserts saved by another process."""
+        meta_path = self._file("meta.json")
+        try:
+            mtime = os.path.getmtime(meta_path)
+        except OSError:
+            return
+        if mtime != self._meta_mtime:
+            with self._lock:
+                self._load()
+
+    def _reserve(self, extra):
+        """Make room for ``extra`` more rows, doubling the memory-mapped files if needed."""
+        needed = self.count + extra
+        if needed <= self.capacity:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        capacity = max(TRAIN_THRESHOLD, 2 * self.capacity, needed)
+        vector_dtype = np.int8 if self.dtype == "int8" else np.float32
+        layout = [
+            ("vectors.npy", vector_dtype, (capacity, self.dim)),
+            ("lists.npy", np.int32, (capacity,)),
+        ]
+        if self.dtype == "int8":
+            layout.append(("scales.npy", np.float32, (capacity,)))
+
+        old = {"vectors.npy": self._vectors, "lists.npy": self._lists, "scales.npy": self._scales}
+        for name, dtype, shape in layout:
+            tmp_path = self._file(f"{name[:-4]}.{os.getpid()}.tmp.npy")
+            grown = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=dtype, shape=shape)
+            if old[name] is not None and self.count:
+                grown[: self.count] = old[name][: self.count]
+            grown.flush()
+            del grown
+            os.replace(tmp_path, self._file(name))
+        self.capacity = capacity
+        self._open_arrays()
+
+    # -- writes ----------------------------------------------------------------
+
+    def _store(self, rows, vectors):
+        if self.dtype == "int8":
+            scales = np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0
+            self._vectors[rows] = np.round(vectors / scales[:, None]).astype(np.int8)
+            self._scales[rows] = scales
+        else:
+            self._vectors[rows] = vectors
+        self._lists[rows] = _nearest(vectors, self.centroids) if self.centroids is not None else 0
+
+    def save(self):
+        with self._lock:
+            self._save()
+
+    def add(self, ids, vectors, hashes=None, save=True):
+        """Insert or overwrite ``ids``; ``hashes`` records what each vector was built from.
+
+        With ``save=False`` the change is not persisted until ``save()`` is
+        called, so a batch of inserts rewrites ``ids.json`` only once.
+        """
+        vectors = _normalize(vectors)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        hashes = hashes or [""] * len(ids)
+        with self._lock:
+            new = [i for i, id_ in enumerate(ids) if id_ not in self.row_of]
+            self._reserve(len(new))
+            rows = np.empty(len(ids), dtype=np.int64)
+            for i, id_ in enumerate(ids):
+                row = self.row_of.get(id_)
+                if row is None:
+                    row = self.row_of[id_] = self.count
+                    self.ids.append(id_)
+                    self.hashes.append(hashes[i])
+                    self.count += 1
+                else:
+                    self.hashes[row] = hashes[i]
+                rows[i] = row
+            self._store(rows, vectors)
+            self._order = self._offsets = None
+
+            if self.centroids is None and self.count >= TRAIN_THRESHOLD:
+                self.train()
+            elif self.centroids is not None and self.count >= RETRAIN_GROWTH * self.trained_count:
+                self.train()
+            if save:
+                self._save()
+
+    def remove(self, ids, save=True):
+        with self._lock:
+            rows = [self.row_of[id_] for id_ in ids if id_ in self.row_of]
+            if rows:
+                self._lists[rows] = -1
+                for row in rows:
+                    self.hashes[row] = ""
+                self._order = self._offsets = None
+                if save:
+                    self._save()
+
+    def train(self, nlist=None):
+        """Cluster the current vectors into ``nlist`` lists (default ``4 * sqrt(n)``) and reassign rows."""
+        with self._lock:
+            live = np.flatnonzero(self._lists[: self.count] >= 0)
+            nlist = nlist or max(1, min(len(live), int(4 * math.sqrt(len(live)))))
+            self.centroids = kmeans(self._decode(live), nlist)
+            for start in range(0, len(live), CHUNK_ROWS):
+                rows = live[start : start + CHUNK_ROWS]
+                self._lists[rows] = _nearest(self._decode(rows), self.centroids)
+            self.trained_count = self.count
+            self._order = self._offsets = None
+            logger.info(f"Trained vector index: {len(live)} vectors in {nlist} lists")
+
+    # -- search ----------------------------------------------------------------
+
+    def _decode(self, rows):
+        vectors = np.asarray(self._vectors[rows], dtype=np.float32)
+        if self.dtype == "int8":
+            vectors *= self._scales[rows][:, None]
+        return vectors
+
+    def _inverted_lists(self):
+        if self._order is None:
+            lists = np.asarray(self._lists[: self.count])
+            order = np.argsort(lists, kind="stable")
+            nlist = len(self.centroids) if self.centroids is not None else 1
+            self._offsets = np.searchsorted(lists[order], np.arange(nlist + 1))
+            self._order = order
+        return self._order, self._offsets
+
+    def _top_k(self, rows, query, k):
+        scores = self._decode(rows) @ query
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [(self.ids[rows[i]], float(scores[i])) for i in top]
+
+    def search(self, query, k=10, nprobe=VECTOR_INDEX_NPROBE):
+        """Return up to ``k`` ``(id, cosine similarity)`` pairs, best first."""
+        query = _normalize(np.atleast_2d(query))[0]
+        with self._lock:
+            if not self.count:
+                return []
+            order, offsets = self._inverted_lists()
+            if self.centroids is None or nprobe >= len(self.centroids):
+                rows = order[offsets[0] :]
+            else:
+                probe = np.argpartition(-(self.centroids @ query), nprobe)[:nprobe]
+                rows = np.concatenate([order[offsets[c] : offsets[c + 1]] for c in probe])
+            return self._top_k(np.sort(rows), query, k)
+
+    def search_exact(self, query, k=10):
+        """Flat scan over every live vector; the reference for recall measurements."""
+        query = _normalize(np.atleast_2d(query))[0]
+        with self._lock:
+            rows, scores = [], []
+            # Contiguous chunks keep the scan a sequential read of the memory map.
+            for start in range(0, self.count, CHUNK_ROWS):
+                stop = min(start + CHUNK_ROWS, self.count)
+                chunk = self._decode(slice(start, stop)) @ query
+                chunk[np.asarray(self._lists[start:stop]) < 0] = -np.inf
+                top = np.argpartition(-chunk, k)[:k] if len(chunk) > k else np.arange(len(chunk))
+                rows.append(top + start)
+                scores.append(chunk[top])
+            if not rows:
+                return []
+            rows, scores = np.concatenate(rows), np.concatenate(scores)
+            best = np.argsort(-scores)[:k]
+            return [(self.ids[rows[i]], float(scores[i])) for i in best if np.isfinite(scores[i])]
+
+
+def record_text(record):
+    """Text embedded for a catalog record: its name (from the URL slug) and description."""
+    name = record.get("url", "").rstrip("/").rsplit("/", 1)[-1].replace("-", " ")
+    return f"{name}. {record.get('description', '')}".strip()
+
+
+def _text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+_encoder = None
+_encoder_lock = threading.Lock()
+
+
+def get_encoder():
+    global _encoder
+    with _encoder_lock:
+        if _encoder is None:
+            from sentence_transformers import SentenceTransformer
+
+            _encoder = SentenceTransformer(EMBEDDING_MODEL)
+        return _encoder
+
+
+def encode(texts):
+    return get_encoder().encode(
+        texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=True
+    ).astype(np.float32)
+
+
+def sync_catalog(index, records, encode=encode, batch_size=EMBEDDING_BATCH_SIZE):
+    """Bring ``index`` in line with ``records``: embed new or changed ones, drop missing ones.
+
+    Only records whose text changed since they were indexed are embedded,
+    ``batch_size`` at a time. The index is saved once at the end, not per
+    batch. Returns the number of vectors written.
+    """
+    wanted = {}
+    for record in records:
+        if record.get("url"):
+            text = record_text(record)
+            wanted[record["url"]] = (text, _text_hash(text))
+
+    stale = [
+        (url, text, digest)
+        for url, (text, digest) in wanted.items()
+        if url not in index.row_of or index.hashes[index.row_of[url]] != digest
+    ]
+    for start in range(0, len(stale), batch_size):
+        batch = stale[start : start + batch_size]
+        vectors = encode([b[1] for b in batch])
+        index.add([b[0] for b in batch], vectors, [b[2] for b in batch], save=False)
+
+    missing = [id_ for id_, digest in zip(index.ids, index.hashes) if digest and id_ not in wanted]
+    index.remove(missing, save=False)
+    if stale or missing:
+        index.save()
+        logger.info(f"Vector index synced: {len(stale)} embedded, {len(missing)} removed")
+    return len(stale)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_vector_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = VectorIndex()
+        _index.reload_if_changed()
+        return _index
@@ -0,0 +1,47 @@
+import logging
+import time
+
+from api.catalog import get_snapshot
+from api.gemini_integeration import get_parser
+from api.gemini_recommender import PROMPT_CACHE_ENABLED, context_cache, get_model
+from api.shl_scraper import BASE_URL, _soup, get_session
+
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+
+def _preconnect():
+    # A HEAD request leaves an established TLS connection in the pool.
+    get_session().head(BASE_URL, timeout=5)
+
+
+WARMUP_STEPS = (
+    ("catalog", get_snapshot),
+    ("facet_index", lambda: get_snapshot().facets),
+    ("html_parser", lambda: _soup("<p></p>")),
+    ("http_pool", _preconnect),
+    ("gemini_parser", get_parser),
+    ("gemini_ranker", get_model),
+    ("ranking_context", lambda: PROMPT_CACHE_ENABLED and context_cache.handle_for(get_snapshot())),
+)
+
+
+def warm_up():
+    """Load everything the first request would otherwise pay for.
+
+    Returns ``{step: seconds}``; a failing step is logged and recorded as
+    ``None`` so one unreachable dependency does not block readiness forever.
+    """
+    timings = {}
+    for name, step in WARMUP_STEPS:
+        start = time.perf_counter()
+        try:
+            step()
+            timings[name] = round(time.perf_counter() - start, 4)
+        except Exception as e:
+            logger.warning(f"Warm-up step {name} failed: {str(e)}")
+            timings[name] = None
+    logger.info(f"Warm-up finished: {timings}")
+    return timings
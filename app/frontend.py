@@ -1,15 +1,24 @@
 import streamlit as st
 import requests
 import json
+import threading
 import time
 import os
-from typing import Dict, List, Any
+from collections import OrderedDict
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Any, Optional, Callable
 
 # API Configuration
 API_URL = os.environ.get("API_URL", "https://shl-project.onrender.com")
 RECOMMEND_ENDPOINT = f"{API_URL}/recommend"
+STREAM_ENDPOINT = f"{API_URL}/recommend/stream"
 HEALTH_ENDPOINT = f"{API_URL}/health"
 
+# Cache configuration
+HEALTH_CHECK_INTERVAL = int(os.environ.get("HEALTH_CHECK_INTERVAL", "30"))
+RECOMMENDATION_TTL = int(os.environ.get("RECOMMENDATION_TTL", "3600"))
+RECOMMENDATION_CACHE_SIZE = int(os.environ.get("RECOMMENDATION_CACHE_SIZE", "256"))
+
 # Page configuration
 st.set_page_config(
     page_title="SHL Assessment Recommender",
@@ -18,13 +27,43 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+@st.cache_resource
+def get_session() -> requests.Session:
+    """Pooled HTTP session shared by every Streamlit session in this process."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+class HealthMonitor:
+    """Poll the API health endpoint in a background thread.
+
+    Page reruns read the last known status instead of waiting on the network.
+    """
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self.available: Optional[bool] = None
+        thread = threading.Thread(target=self._run, daemon=True)
+        thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                response = get_session().get(HEALTH_ENDPOINT, timeout=5)
+                self.available = response.status_code == 200
+            except Exception:
+                self.available = False
+            time.sleep(self.interval)
+
+@st.cache_resource
+def get_health_monitor() -> HealthMonitor:
+    return HealthMonitor(HEALTH_CHECK_INTERVAL)
+
 def check_api_health() -> bool:
-    """Check if the API is available."""
-    try:
-        response = requests.get(HEALTH_ENDPOINT, timeout=5)
-        return response.status_code == 200
-    except Exception:
-        return False
+    """Check if the API is available; unknown counts as available until the first poll lands."""
+    return get_health_monitor().available is not False
 
 def format_duration(duration: int) -> str:
     """Format duration in a readable way."""
@@ -32,20 +71,109 @@ def format_duration(duration: int) -> str:
         return "Unknown"
     return f"{duration} minutes"
 
-def get_recommendations(job_description: str) -> Dict[str, Any]:
+def normalize_query(job_description: str) -> str:
+    """Collapse whitespace so trivially different pastes share a cache entry."""
+    return " ".join(job_description.split())
+
+class RecommendationCache:
+    """Bounded LRU of recommendation responses: normalized query -> (timestamp, response).
+
+    Shared by every session in the process, so access is locked.
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(query)
+            if entry is None:
+                return None
+            if time.time() - entry[0] >= self.ttl:
+                del self._entries[query]
+                return None
+            self._entries.move_to_end(query)
+            return entry[1]
+
+    def set(self, query: str, results: Dict[str, Any]):
+        with self._lock:
+            self._entries[query] = (time.time(), results)
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+@st.cache_resource
+def shared_recommendations() -> RecommendationCache:
+    return RecommendationCache(RECOMMENDATION_CACHE_SIZE, RECOMMENDATION_TTL)
+
+def cached_recommendations(query: str) -> Optional[Dict[str, Any]]:
+    return shared_recommendations().get(query)
+
+def is_successful(results: Dict[str, Any]) -> bool:
+    """Only real rankings are worth reusing; "no filters" answers usually mean a failed parse."""
+    recommendations = results.get("recommendations") if results else None
+    return isinstance(recommendations, dict) and bool(recommendations.get("recommended_assessments"))
+
+def remember_recommendations(query: str, results: Dict[str, Any]):
+    if is_successful(results):
+        shared_recommendations().set(query, results)
+
+def stream_recommendations(query: str, on_stage: Callable[[str, Any], None]) -> Optional[Dict[str, Any]]:
+    """Consume the streaming endpoint; returns None when the API does not offer one."""
+    if st.session_state.get("stream_unsupported"):
+        return None
+
+    with get_session().post(STREAM_ENDPOINT, json={"query": query}, stream=True, timeout=1000) as response:
+        if response.status_code in (404, 405):
+            st.session_state["stream_unsupported"] = True
+            return None
+        response.raise_for_status()
+
+        for line in response.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            if event["stage"] == "error":
+                raise requests.exceptions.RequestException(event["data"].get("detail"))
+            if event["stage"] == "recommendations":
+                return event["data"]
+            on_stage(event["stage"], event["data"])
+    return {}
+
+def get_recommendations(job_description: str, on_stage: Optional[Callable[[str, Any], None]] = None) -> Dict[str, Any]:
     """Get assessment recommendations from the API."""
+    # The normalized text only keys the cache; the API gets the original, whose
+    # line breaks mark the headings and sections the compressor works with.
+    cache_key = normalize_query(job_description)
+    results = cached_recommendations(cache_key)
+    if results is not None:
+        return results
+
     try:
-        response = requests.post(
-            RECOMMEND_ENDPOINT,
-            json={"query": job_description},
-            timeout=1000,
-        )
-        response.raise_for_status()
-        return response.json()
+        results = stream_recommendations(job_description, on_stage or (lambda stage, data: None))
+        if results is None:
+            response = get_session().post(
+                RECOMMEND_ENDPOINT,
+                json={"query": job_description},
+                timeout=1000,
+            )
+            response.raise_for_status()
+            results = response.json()
     except requests.exceptions.RequestException as e:
         st.error(f"Error connecting to API: {str(e)}")
         return {}
 
+    remember_recommendations(cache_key, results)
+    return results
+
+STAGE_MESSAGES = {
+    "filters": "🧭 Extracted search criteria, searching the SHL catalog...",
+    "candidates": "📚 Ranking candidate assessments...",
+}
+
 def display_assessment(assessment: Dict[str, Any], index: int, show_score: bool = True):
     """Display an assessment with its details."""
     assessment_data = assessment.get("assessment", assessment)
@@ -118,8 +246,13 @@ def main():
 
         if submit_button and job_description and api_available:
             with st.spinner("🔍 Analyzing job description and fetching recommendations..."):
+                progress = st.empty()
                 start_time = time.time()
-                results = get_recommendations(job_description)
+                results = get_recommendations(
+                    job_description,
+                    on_stage=lambda stage, data: progress.info(STAGE_MESSAGES.get(stage, stage)),
+                )
+                progress.empty()
                 processing_time = time.time() - start_time
 
                 if results:
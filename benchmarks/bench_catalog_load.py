@@ -0,0 +1,118 @@
+"""Compare the JSON catalog with the columnar snapshot, from open to the first answered query.
+
+``open`` is just loading the file. ``first query`` is what a fresh worker does
+before it can answer: load the catalog, build the facet index and filter with
+it, build the JD compression vocabulary, and rank once -- rendering the
+catalog prompt and validating a (recorded, offline) model response. Time,
+heap retained afterwards and peak heap (via ``tracemalloc``, on a separate
+run) are reported for both formats. Run from the repository root:
+
+    python -m benchmarks.bench_catalog_load --size 100000
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+from api.catalog import CatalogSnapshot
+from api.columnar import ColumnarCatalog, write_columnar
+from api.gemini_recommender import (
+    build_catalog_context,
+    build_query_prompt,
+    fix_recommended_assessments_json,
+)
+from api.jd_compress import CatalogVocabulary
+from api.models import Filters
+from api.prompt_cache import RecordingBackend
+from benchmarks.bench_facets import synthetic_catalog
+
+FILTERS = {"keywords": "java", "job_level": "Mid-Professional", "duration": "<= 30 minutes"}
+
+
+def measure(fn):
+    # Timed on its own run: tracing allocations slows Python code severalfold.
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = fn()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, retained, peak
+
+
+def first_query(open_catalog, version=None):
+    """Everything a fresh worker does to answer one query; returns what it keeps."""
+    snapshot = CatalogSnapshot(open_catalog(), version=version)
+    candidates = snapshot.filter(Filters.from_dict(FILTERS))
+    vocabulary = CatalogVocabulary(snapshot.records)
+    prompt = build_catalog_context(snapshot.records) + build_query_prompt(
+        "Mid-level Java developer", 10, candidate_urls=[c["url"] for c in candidates[:50]]
+    )
+    urls = [c["url"] for c in candidates[:10]]
+    response = RecordingBackend(
+        json.dumps(
+            {
+                "recommended_assessments": [
+                    {
+                        "url": url,
+                        "adaptive_support": "No",
+                        "description": "",
+                        "duration": 20,
+                        "remote_support": "Yes",
+                        "test_type": ["K"],
+                    }
+                    for url in urls
+                ]
+            }
+        )
+    ).generate_plain(prompt)
+    fix_recommended_assessments_json(json.loads(response))
+    return snapshot, vocabulary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    records = synthetic_catalog(args.size)
+    for i, record in enumerate(records):
+        record["description"] = f"Synthetic assessment {i} measuring job-relevant skills. " * 6
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "catalog.json")
+        cat_path = os.path.join(tmp, "catalog.cat")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(records, f, indent=4, ensure_ascii=False)
+        write_columnar(records, cat_path, version="bench")
+        del records
+
+        def load_json():
+            with open(json_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        formats = (
+            ("json", load_json, json_path, None),
+            ("columnar", lambda: ColumnarCatalog(cat_path), cat_path, "bench"),
+        )
+        for name, open_catalog, path, version in formats:
+            print(f"{name}: {os.path.getsize(path) / 1e6:.1f} MB on disk")
+            for stage, fn in (
+                ("open", open_catalog),
+                ("first query", lambda: first_query(open_catalog, version)),
+            ):
+                result, elapsed, retained, peak = measure(fn)
+                print(
+                    f"  {stage:<12} {elapsed * 1e3:9.1f} ms  "
+                    f"{retained / 1e6:7.1f} MB heap retained  {peak / 1e6:7.1f} MB peak"
+                )
+                del result
+
+
+if __name__ == "__main__":
+    main()
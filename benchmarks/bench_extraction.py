@@ -0,0 +1,113 @@
+"""Benchmark assessment page extraction at different process-pool sizes.
+
+Pages go through ``ExtractionPool.submit`` one at a time and the futures are
+resolved in order, as the catalog refresher does. Parses every ``*.html`` page in a fixture directory (the file name, minus the
+extension, is used as the URL slug). Without ``--fixtures`` a directory of
+synthetic pages shaped like the SHL product pages is generated. Run from the
+repository root:
+
+    python -m benchmarks.bench_extraction --fixtures pages/ --workers 1 2 4 8
+    python -m benchmarks.bench_extraction --pages 400
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from api.extraction import ExtractionPool
+from benchmarks.bench_facets import synthetic_catalog
+
+PAGE = """<!DOCTYPE html>
+<html><head><title>{slug} | SHL</title></head>
+<body>
+<nav>{nav}</nav>
+<div class="product-catalogue">
+  <div class="product-catalogue-training-calendar__row"><h4>Description</h4><p>{description}</p></div>
+  <div class="product-catalogue-training-calendar__row"><h4>Job levels</h4><p>{job_levels}</p></div>
+  <div class="product-catalogue-training-calendar__row"><h4>Languages</h4><p>{languages}</p></div>
+  <div class="product-catalogue-training-calendar__row"><h4>Assessment length</h4><p>{time}</p></div>
+  <p>Test Type: <span class="product-catalogue__key">{test_type}</span></p>
+  <p>Remote Testing: <span class="catalogue__circle {remote}"></span></p>
+</div>
+<footer>{footer}</footer>
+</body></html>
+"""
+
+
+def write_fixtures(directory, count):
+    nav = "".join(f'<a href="/products/{i}/">Product {i}</a>' for i in range(300))
+    footer = "<p>Copyright SHL and its affiliates. All rights reserved.</p>" * 40
+    for i, record in enumerate(synthetic_catalog(count)):
+        slug = f"assessment-{i}"
+        with open(os.path.join(directory, f"{slug}.html"), "w", encoding="utf-8") as f:
+            f.write(
+                PAGE.format(
+                    slug=slug,
+                    nav=nav,
+                    footer=footer,
+                    description=f"Synthetic assessment {i} measuring job-relevant skills. " * 6,
+                    job_levels=", ".join(record["job_levels"]),
+                    languages=", ".join(record["languages"]),
+                    time=record["assessment_time"],
+                    test_type=record["test_type"],
+                    remote="-yes" if record["remote_testing"] == "Yes" else "-no",
+                )
+            )
+
+
+def load_pages(directory):
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".html"):
+            url = f"https://www.shl.com/products/product-catalog/view/{name[:-5]}/"
+            with open(os.path.join(directory, name), "rb") as f:
+                pages.append((url, f.read()))
+    return pages
+
+
+def submit_all(pool, pages):
+    futures = [pool.submit(url, body) for url, body in pages]
+    return [future.result() for future in futures]
+
+
+def run(pages, workers):
+    with ExtractionPool(workers) as pool:
+        # Spawn and import the workers before timing.
+        submit_all(pool, pages[: max(1, workers) * 2])
+        start = time.perf_counter()
+        records = submit_all(pool, pages)
+        elapsed = time.perf_counter() - start
+    assert len(records) == len(pages)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", help="directory of saved assessment pages")
+    parser.add_argument("--pages", type=int, default=400, help="synthetic pages to generate")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.fixtures
+        if not directory:
+            directory = tmp
+            write_fixtures(directory, args.pages)
+        pages = load_pages(directory)
+
+    size = sum(len(body) for _, body in pages)
+    print(f"{len(pages)} pages, {size / 1e6:.1f} MB, {os.cpu_count()} CPUs")
+
+    baseline = run(pages, 0)
+    print(f"{'inline':>8}  {baseline:7.2f} s  {len(pages) / baseline:8.1f} pages/s")
+    for workers in args.workers:
+        elapsed = run(pages, workers)
+        print(
+            f"{workers:>8}  {elapsed:7.2f} s  {len(pages) / elapsed:8.1f} pages/s  "
+            f"{baseline / elapsed:5.2f}x inline"
+        )
+
+
+if __name__ == "__main__":
+    main()
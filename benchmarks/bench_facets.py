@@ -0,0 +1,79 @@
+"""Benchmark the facet index over a synthetic catalog.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_facets --size 100000
+"""
+
+import argparse
+import random
+import time
+import timeit
+
+from api.facets import FacetIndex, query_from_filters
+from api.models import Filters
+from api.shl_scraper import SHL_FILTER_IDS
+
+TEST_TYPES = "ABCDEKPS"
+
+
+def synthetic_catalog(size, seed=0):
+    rng = random.Random(seed)
+    job_levels = list(SHL_FILTER_IDS["job_level"])
+    languages = list(SHL_FILTER_IDS["language"])
+    records = []
+    for i in range(size):
+        records.append(
+            {
+                "url": f"https://example.com/assessment/{i}/",
+                "job_levels": rng.sample(job_levels, rng.randint(1, 4)),
+                "languages": rng.sample(languages, rng.randint(1, 6)),
+                "test_type": "".join(rng.sample(TEST_TYPES, rng.randint(1, 3))),
+                "remote_testing": rng.choice(["Yes", "No"]),
+                "assessment_time": f"Approximate Completion Time in minutes = {rng.randint(5, 90)}",
+            }
+        )
+    return records
+
+
+QUERIES = {
+    "job level": {"job_level": "Entry-Level"},
+    "job level + language": {"job_level": "Mid-Professional", "language": "English"},
+    "<= 30 minutes": {"duration": "<= 30 minutes"},
+    "all facets": {
+        "job_level": "Entry-Level",
+        "language": "English",
+        "test_type": "K",
+        "remote_testing": "Yes",
+        "duration": "20-40 minutes",
+    },
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=1000)
+    args = parser.parse_args()
+
+    records = synthetic_catalog(args.size)
+
+    start = time.perf_counter()
+    index = FacetIndex(records)
+    print(f"Built index over {args.size} records in {time.perf_counter() - start:.3f}s")
+
+    for name, filters in QUERIES.items():
+        kwargs = query_from_filters(Filters.from_dict(filters))
+        per_query = timeit.timeit(lambda: index.query(**kwargs), number=args.repeat)
+        mask = index.query(**kwargs)
+        start = time.perf_counter()
+        index.indices(mask)
+        materialize = time.perf_counter() - start
+        print(
+            f"{name:<24} {per_query / args.repeat * 1e6:8.1f} us/query  "
+            f"{index.count(mask):7d} matches  {materialize * 1e3:6.2f} ms to list indices"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Measure the typed ``Filters`` record against the dict filters it replaced.
+
+Runs the per-request work that reads the parsed filters -- facet query
+translation, search URL building and traffic combinations -- once on the
+parser's loosely shaped dict, the way it was done before ``Filters``, and
+once on the slotted class, including building it. Reports time per request
+and the memory allocated per request (via ``tracemalloc``), plus the size of
+one filters object kept for the whole request. Run from the repository root:
+
+    python -m benchmarks.bench_models
+    python -m benchmarks.bench_models --requests 20000
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+
+from api.cache_warming import combination_of
+from api.facets import parse_duration_filter, query_from_filters
+from api.models import Filters
+from api.search_planner import BASE_FILTERS, split_keywords
+from api.shl_scraper import SHL_FILTER_IDS, build_single_search_url
+
+RAW_FILTERS = {
+    "keywords": "Java, core java, Spring, SQL",
+    "job_family": "Information Technology",
+    "job_level": "Mid-Professional",
+    "language": "English",
+    "test_type": "Knowledge & Skills, Personality & Behavior",
+    "remote_testing": "Yes",
+    "duration": "<= 40 minutes",
+}
+
+
+# The dict-based stages as they were before Filters.
+
+_LEGACY_TEST_TYPE_CODES = {"knowledge & skills": "K", "personality & behavior": "P"}
+
+
+def legacy_query_from_filters(filters):
+    kwargs = {}
+    if filters.get("job_level"):
+        kwargs["job_levels"] = [filters["job_level"]]
+    if filters.get("language"):
+        kwargs["languages"] = [filters["language"]]
+    if filters.get("test_type"):
+        test_types = filters["test_type"]
+        if isinstance(test_types, str):
+            test_types = [t.strip() for t in test_types.split(",")]
+        kwargs["test_types"] = [
+            _LEGACY_TEST_TYPE_CODES.get(t.lower(), t.upper()) for t in test_types if t
+        ]
+    if filters.get("remote_testing"):
+        kwargs["remote"] = str(filters["remote_testing"]).lower() in ("yes", "true", "1")
+    min_minutes, max_minutes = parse_duration_filter(filters.get("duration"))
+    if filters.get("min_duration") is not None:
+        min_minutes = int(filters["min_duration"])
+    if filters.get("max_duration") is not None:
+        max_minutes = int(filters["max_duration"])
+    if min_minutes is not None:
+        kwargs["min_minutes"] = min_minutes
+    if max_minutes is not None:
+        kwargs["max_minutes"] = max_minutes
+    return kwargs
+
+
+def legacy_build_single_search_url(filters):
+    params = []
+    if "keyword" in filters and filters["keyword"]:
+        params.append(f"keyword={filters['keyword'].replace(' ', '+')}")
+        params.append("action_doFilteringForm=Search")
+    for key in ["job_family", "job_level", "industry", "language"]:
+        if key in filters and filters[key]:
+            id_map = SHL_FILTER_IDS.get(key, {})
+            if filters[key] in id_map:
+                params.append(f"{key}={id_map[filters[key]]}")
+    params.append("f=1")
+    return "https://www.shl.com/products/product-catalog/?" + "&".join(params)
+
+
+def legacy_request(raw):
+    filters = dict(raw)
+    legacy_query_from_filters(filters)
+    urls = []
+    for keyword in split_keywords(filters.get("keywords")):
+        keyword_filters = filters.copy()
+        keyword_filters["keyword"] = keyword
+        urls.append(legacy_build_single_search_url(keyword_filters))
+    [filters.get(name) for name in BASE_FILTERS]
+    {name: filters.get(name) or None for name in ("job_family", "job_level")}
+    return urls
+
+
+def typed_request(raw):
+    filters = Filters.from_dict(raw)
+    query_from_filters(filters)
+    urls = [build_single_search_url(filters, keyword) for keyword in filters.keywords]
+    [getattr(filters, name) for name in BASE_FILTERS]
+    combination_of(filters)
+    return urls
+
+
+def measure(request, raw, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        request(raw)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    result = request(raw)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    # Peak is the working set of one request; retained is what its result keeps alive.
+    return elapsed / requests, peak - before, current - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=10_000)
+    args = parser.parse_args()
+
+    assert legacy_request(RAW_FILTERS) == typed_request(RAW_FILTERS)
+
+    filters = Filters.from_dict(RAW_FILTERS)
+    print(
+        f"filters object: dict {sys.getsizeof(dict(RAW_FILTERS))} bytes, "
+        f"Filters {sys.getsizeof(filters)} bytes"
+    )
+    print(f"{args.requests} requests")
+    for name, request in (("dicts", legacy_request), ("typed", typed_request)):
+        per_request, peak, retained = measure(request, RAW_FILTERS, args.requests)
+        print(
+            f"{name:>6}  {per_request * 1e6:8.1f} us/request  "
+            f"{peak / 1024:6.1f} KiB peak  {retained / 1024:6.1f} KiB retained"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Count prompt tokens sent for ranking with and without the cached catalog context.
+
+Uses the local RecordingBackend, so no API key or network is needed:
+
+    python -m benchmarks.bench_prompt_cache --queries 50
+"""
+
+import argparse
+
+import api.gemini_recommender as recommender
+from api.catalog import get_snapshot
+from api.prompt_cache import RecordingBackend
+
+QUERY = (
+    "Entry-level sales representative selling software subscriptions over the phone; "
+    "needs strong spoken English and basic computer literacy."
+)
+
+
+def run(queries, shortlist, cached):
+    backend = RecordingBackend()
+    recommender.PROMPT_CACHE_ENABLED = cached
+    recommender.set_ranking_backend(backend)
+    for i in range(queries):
+        recommender.get_top_assessments_with_gemini(f"{QUERY} #{i}", k=10, assessments=shortlist)
+    return backend
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--shortlist", type=int, default=20, help="Search candidates per query")
+    args = parser.parse_args()
+
+    snapshot = get_snapshot()
+    shortlist = list(snapshot.records)[: args.shortlist]
+    print(f"Catalog snapshot {snapshot.version}: {len(snapshot)} assessments")
+
+    for cached in (False, True):
+        backend = run(args.queries, shortlist, cached)
+        print(
+            f"{'cached context' if cached else 'plain prompt':<15} "
+            f"{backend.prompt_tokens:9d} prompt tokens over {backend.calls} calls "
+            f"({backend.contexts_created} context uploads)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Measure cold-start cost: importing the API, warm-up, and the first requests.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --recommend "Entry-level sales representative..."
+
+``--recommend`` sends one real /recommend request and therefore needs
+GEMINI_API_KEY and network access.
+"""
+
+import argparse
+import logging
+import statistics
+import subprocess
+import sys
+import time
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import api.app; print(time.perf_counter() - t)"
+
+
+def measure_import(repeat):
+    samples = []
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True
+        )
+        samples.append(float(out.stdout.strip().splitlines()[-1]))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--recommend", help="Job description for one first /recommend call")
+    args = parser.parse_args()
+
+    samples = measure_import(args.repeat)
+    print(f"import api.app: median {statistics.median(samples) * 1e3:.0f} ms over {args.repeat} runs")
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    from fastapi.testclient import TestClient
+
+    from api.app import app
+
+    start = time.perf_counter()
+    with TestClient(app) as client:
+        while client.get("/ready").status_code != 200:
+            time.sleep(0.05)
+        ready_after = time.perf_counter() - start
+        print(f"ready after {ready_after * 1e3:.0f} ms; steps: {client.get('/ready').json()['warmup']}")
+
+        start = time.perf_counter()
+        client.get("/health")
+        print(f"first /health: {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+        if args.recommend:
+            start = time.perf_counter()
+            response = client.post("/recommend", json={"query": args.recommend})
+            print(
+                f"first /recommend: {(time.perf_counter() - start):.2f} s "
+                f"(status {response.status_code})"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Benchmark the IVF vector index against exact search on synthetic embeddings.
+
+Embeddings are drawn around random topic centres, like sentence embeddings of
+related assessment descriptions, and queries are perturbed catalog items.
+Reports build time, recall@k against the flat scan and queries per second for
+each ``nprobe``. Run from the repository root:
+
+    python -m benchmarks.bench_vector_index --sizes 10000 100000
+    python -m benchmarks.bench_vector_index --dtype int8 --nprobe 4 16 64
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from api.vector_index import VectorIndex
+
+
+def synthetic_embeddings(size, dim, topics=None, seed=0):
+    rng = np.random.default_rng(seed)
+    topics = topics or max(16, size // 100)
+    centres = rng.standard_normal((topics, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, topics, size)] + 0.6 * rng.standard_normal((size, dim)).astype(
+        np.float32
+    )
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def run(size, dim, dtype, nprobes, queries, k, batch):
+    vectors = synthetic_embeddings(size, dim)
+    rng = np.random.default_rng(1)
+    picks = rng.integers(0, size, queries)
+    query_vectors = vectors[picks] + 0.3 * rng.standard_normal((queries, dim)).astype(np.float32)
+    ids = [f"assessment-{i}" for i in range(size)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex(tmp, dtype=dtype)
+        start = time.perf_counter()
+        # Inserted in batches, the way catalog refreshes add them.
+        for offset in range(0, size, batch):
+            index.add(ids[offset : offset + batch], vectors[offset : offset + batch])
+        build = time.perf_counter() - start
+        print(
+            f"\n{size} vectors x {dim} {dtype}: built in {build:.1f}s, "
+            f"{len(index.centroids) if index.centroids is not None else 0} lists"
+        )
+
+        start = time.perf_counter()
+        exact = [{i for i, _ in index.search_exact(q, k)} for q in query_vectors]
+        flat_qps = queries / (time.perf_counter() - start)
+        print(f"{'exact':>8}  recall@{k} 1.000  {flat_qps:9.0f} q/s")
+
+        for nprobe in nprobes:
+            start = time.perf_counter()
+            found = [{i for i, _ in index.search(q, k, nprobe)} for q in query_vectors]
+            qps = queries / (time.perf_counter() - start)
+            recall = np.mean([len(f & e) / len(e) for f, e in zip(found, exact)])
+            print(
+                f"{'nprobe ' + str(nprobe):>8}  recall@{k} {recall:.3f}  {qps:9.0f} q/s  "
+                f"{qps / flat_qps:5.1f}x exact"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--dtype", choices=["float32", "int8"], default="float32")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=5000, help="vectors per insert")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        run(size, args.dim, args.dtype, args.nprobe, args.queries, args.k, args.batch)
+
+
+if __name__ == "__main__":
+    main()
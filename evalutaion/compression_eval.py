@@ -0,0 +1,102 @@
+"""Compare recommendation quality with and without job description compression.
+
+Runs every labeled query through the pipeline in-process with the raw job
+description and then compressed at each ``--budget``, and reports recall@k /
+MAP@k for each against the raw run, along with the compression ratio and the
+query tokens sent to the model. Budgets below the length of the labeled job
+descriptions are what show the recall/token trade-off; at the default budget
+short queries are sent unchanged. Predictions are written per mode and budget
+so a rerun only scores them.
+
+    python -m evalutaion.compression_eval --queries evalutaion/labeled_queries.json
+    python -m evalutaion.compression_eval --budget 400 100 50 --k 3 10
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from api import jd_compress
+from api.prompt_cache import count_tokens
+from evalutaion.harness import EmbeddingCache, collect_predictions, evaluate
+
+DEFAULT_BUDGETS = sorted({jd_compress.JD_TOKEN_BUDGET, 100, 50}, reverse=True)
+
+
+def run_queries(queries, compress, predictions_path):
+    """Run the pipeline for every query not already in ``predictions_path``."""
+    from api.app import iter_recommendation
+
+    done = collect_predictions(queries, predictions_path=predictions_path)
+    jd_compress.JD_COMPRESSION = compress
+    for item in queries:
+        if item["query"] in done:
+            continue
+        start = time.perf_counter()
+        body = {}
+        for stage, payload in iter_recommendation(item["query"]):
+            if stage == "recommendations":
+                body = payload
+        entry = {
+            "query": item["query"],
+            "recommendations": body.get("recommendations", {}).get("recommended_assessments", []),
+            "latency": time.perf_counter() - start,
+        }
+        done[item["query"]] = entry
+        with open(predictions_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall / MAP with and without JD compression")
+    parser.add_argument("--queries", default="evalutaion/labeled_queries.json")
+    parser.add_argument("--budget", type=int, nargs="+", default=DEFAULT_BUDGETS)
+    parser.add_argument("--output-dir", default="compression_eval")
+    parser.add_argument("--cache-dir", default="embedding_cache")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--threshold", type=float, default=0.8)
+    args = parser.parse_args()
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    cache = EmbeddingCache(args.cache_dir)
+    raw_tokens = np.array([count_tokens(q["query"]) for q in queries])
+
+    raw_path = os.path.join(args.output_dir, "predictions_raw.jsonl")
+    raw = evaluate(queries, run_queries(queries, False, raw_path), cache, args.k, args.threshold)
+    print(f"Queries: {len(queries)}  query tokens: {raw_tokens.sum()}  (min {raw_tokens.min()}, max {raw_tokens.max()})")
+
+    for budget in args.budget:
+        jd_compress.JD_TOKEN_BUDGET = budget
+        compressed_tokens = np.array(
+            [
+                count_tokens(jd_compress.compress_job_description(q["query"], budget=budget)[0])
+                for q in queries
+            ]
+        )
+        ratios = compressed_tokens / np.maximum(raw_tokens, 1)
+        path = os.path.join(args.output_dir, f"predictions_compressed_{budget}.jsonl")
+        comp = evaluate(queries, run_queries(queries, True, path), cache, args.k, args.threshold)
+
+        print(
+            f"\nBudget {budget}: query tokens {raw_tokens.sum()} -> {compressed_tokens.sum()}  "
+            f"ratio mean {ratios.mean():.2f}, min {ratios.min():.2f}  "
+            f"compressed queries: {(ratios < 1).sum()}"
+        )
+        for k in args.k:
+            print(
+                f"Recall@{k}: {raw[k]['recall'].mean():.4f} -> {comp[k]['recall'].mean():.4f} "
+                f"({comp[k]['recall'].mean() - raw[k]['recall'].mean():+.4f})  "
+                f"MAP@{k}: {raw[k]['ap'].mean():.4f} -> {comp[k]['ap'].mean():.4f} "
+                f"({comp[k]['ap'].mean() - raw[k]['ap'].mean():+.4f})"
+            )
+
+
+if __name__ == "__main__":
+    main()
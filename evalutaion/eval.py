@@ -1,13 +1,25 @@
+"""Score the last response in recommendationsResponse.txt against the product descriptions.
+
+Run from the repository root:
+
+    python -m evalutaion.eval
+"""
+
 import json
-import torch
-from sentence_transformers import SentenceTransformer, util
+import os
+
+import numpy as np
+
+from evalutaion.harness import EmbeddingCache
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+GROUND_TRUTH_PATH = os.path.join(os.path.dirname(__file__), "shl_product_descriptions.json")
+
+cache = EmbeddingCache()
 
 with open("recommendationsResponse.txt", "r", encoding="utf-8") as f:
     predictions = json.load(f)
 
-with open("shl_product_descriptions.json", "r", encoding="utf-8") as f:
+with open(GROUND_TRUTH_PATH, "r", encoding="utf-8") as f:
     ground_truth = json.load(f)
 
 true_descriptions = [entry["description"] for entry in ground_truth]
@@ -16,40 +28,38 @@ true_names = [entry["name"] for entry in ground_truth]
 predicted_descriptions = [rec["description"] for rec in predictions["recommendations"]["recommended_assessments"]]
 predicted_names = [rec["url"].split("/")[-2] for rec in predictions["recommendations"]["recommended_assessments"]]
 
-true_embeddings = model.encode(true_descriptions, convert_to_tensor=True, normalize_embeddings=True)
-pred_embeddings = model.encode(predicted_descriptions, convert_to_tensor=True, normalize_embeddings=True)
+true_embeddings = cache.encode(true_descriptions)
+pred_embeddings = cache.encode(predicted_descriptions)
 
-similarities = util.cos_sim(pred_embeddings, true_embeddings)  # [preds x truths]
+similarities = pred_embeddings @ true_embeddings.T  # [preds x truths]
 
 name_to_index = {name: i for i, name in enumerate(true_names)}
-ground_truth_indices = [name_to_index.get(name, -1) for name in predicted_names]
-
-def recall_at_k(similarities, ground_truth_indices, k=10):
-    recalls = []
-    for i, true_idx in enumerate(ground_truth_indices):
-        if true_idx == -1:
-            continue
-        top_k = torch.topk(similarities[i], k).indices.tolist()
-        recalls.append(1 if true_idx in top_k else 0)
-    return sum(recalls) / len(recalls) if recalls else 0.0
-
-def map_at_k(similarities, ground_truth_indices, k=10):
-    ap_scores = []
-    for i, true_idx in enumerate(ground_truth_indices):
-        if true_idx == -1:
-            continue
-        top_k = torch.topk(similarities[i], k).indices.tolist()
-        if true_idx in top_k:
-            rank = top_k.index(true_idx) + 1
-            ap_scores.append(1.0 / rank)
-        else:
-            ap_scores.append(0.0)
-    return sum(ap_scores) / len(ap_scores) if ap_scores else 0.0
+ground_truth_indices = np.array([name_to_index.get(name, -1) for name in predicted_names])
 
 k = 10
+# Top-k truths for every prediction at once, ordered by descending similarity.
+top_k_indices = np.argsort(-similarities, axis=1)[:, :k]
+
+def recall_at_k(top_k_indices, ground_truth_indices, k=10):
+    valid = ground_truth_indices != -1
+    if not valid.any():
+        return 0.0
+    hits = (top_k_indices[valid, :k] == ground_truth_indices[valid, None]).any(axis=1)
+    return float(hits.mean())
+
+def map_at_k(top_k_indices, ground_truth_indices, k=10):
+    valid = ground_truth_indices != -1
+    if not valid.any():
+        return 0.0
+    hits = top_k_indices[valid, :k] == ground_truth_indices[valid, None]
+    reciprocal_ranks = (hits / np.arange(1, hits.shape[1] + 1)).sum(axis=1)
+    return float(reciprocal_ranks.mean())
+
 for i, pred_name in enumerate(predicted_names):
-    top_k_indices = torch.topk(similarities[i], k).indices.tolist()
     print(f"\n🔍 Prediction {i+1}: '{pred_name}'")
     print("Top matches:")
-    for rank, idx in enumerate(top_k_indices, 1):
-        print(f"{rank}. {true_names[idx]} (Score: {similarities[i][idx]:.4f})")
\ No newline at end of file
+    for rank, idx in enumerate(top_k_indices[i], 1):
+        print(f"{rank}. {true_names[idx]} (Score: {similarities[i][idx]:.4f})")
+
+print(f"\nRecall@{k}: {recall_at_k(top_k_indices, ground_truth_indices, k):.4f}")
+print(f"MAP@{k}: {map_at_k(top_k_indices, ground_truth_indices, k):.4f}")
@@ -1,95 +1,186 @@
-import requests
-from bs4 import BeautifulSoup
+"""Build the ground-truth description file from a list of SHL product pages.
+
+    python evaluation.py --products products.json --output shl_product_descriptions.json
+
+Pages are fetched concurrently with a per-host rate limit and kept in an
+on-disk response cache, so reruns only hit the network for new URLs. Each
+scraped product is appended to ``<output>.partial.jsonl`` as soon as it is
+done; an interrupted run resumes from there.
+"""
+
+import argparse
+import hashlib
 import json
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import suppress
+from urllib.parse import urlparse
 
-# Original data
-products = [
-    {
-        "name": "Entry level Sales 7.1 (International)",
-        "url": "https://www.shl.com/solutions/products/product-catalog/view/entry-level-sales-7-1/"
-    },
-    {
-        "name": "Entry Level Sales Sift Out 7.1",
-        "url": "https://www.shl.com/solutions/products/product-catalog/view/entry-level-sales-sift-out-7-1/"
-    },
-    {
-        "name": "Entry Level Sales Solution",
-        "url": "https://www.shl.com/solutions/products/product-catalog/view/entry-level-sales-solution/"
-    },
-    {
-        "name": "Sales Representative Solution",
-        "url": "https://www.shl.com/solutions/products/product-catalog/view/sales-representative-solution/"
-    },
-    {
-        "name": "Sales Support Specialist Solution",
-        "url": "https://www.shl.com/solutions/products/product-catalog/view/sales-support-specialist-solution/"
-    },
-    {
-        "name": "Technical Sales Associate Solution",
-        "url": "https://www.shl.com/solutions/products/product-catalog/view/technical-sales-associate-solution/"
-    },
-    {
-        "name": "SVAR - Spoken English (Indian Accent)",
-        "url": "https://www.shl.com/solutions/products/product-catalog/view/svar-spoken-english-indian-accentnew/"
-    },
-    {
-        "name": "Sales & Service Phone Solution",
-        "url": "https://www.shl.com/solutions/products/product-catalog/view/sales-and-service-phone-solution/"
-    },
-    {
-        "name": "Sales & Service Phone Simulation",
-        "url": "https://www.shl.com/solutions/products/product-catalog/view/sales-and-service-phone-simulation/"
-    },
-    {
-        "name": "English Comprehension (New)",
-        "url": "https://www.shl.com/solutions/products/product-catalog/view/english-comprehension-new/"
-    }
-]
-
-output = []
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
 
 # Headers to simulate a real browser
 headers = {
     "User-Agent": "Mozilla/5.0"
 }
 
-for product in products:
-    try:
-        response = requests.get(product["url"], headers=headers)
-        soup = BeautifulSoup(response.content, "html.parser")
-        print("ge")
-        # Updated logic: Find <h4>Description</h4> and then next <p>
-        desc_header = soup.find("h4", string="Description")
-        if desc_header:
-            desc_para = desc_header.find_next("p")
-            if desc_para:
-                description = desc_para.get_text(strip=True)
-            else:
-                description = "Description paragraph not found"
-        else:
-            description = "Description header not found"
-
-        output.append({
-            "name": product["name"],
-            "url": product["url"],
-            "description": description
-        })
+# Only headings and paragraphs are needed to locate the description.
+DESCRIPTION_TAGS = SoupStrainer(["h4", "p"])
+
+
+class HostRateLimiter:
+    """Space out requests to the same host by at least ``interval`` seconds."""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class ResponseCache:
+    """Raw page bodies stored as ``<dir>/<sha256(url)>.html``."""
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url):
+        return os.path.join(self.cache_dir, hashlib.sha256(url.encode("utf-8")).hexdigest() + ".html")
+
+    def get(self, url):
+        try:
+            with open(self._path(url), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, url, body):
+        path = self._path(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(body)
+        os.replace(tmp_path, path)
 
-        print(f"Scraped: {product['name']}")
-        time.sleep(1)  # Delay for server courtesy
 
+def fetch(url, session, cache, limiter, timeout):
+    body = cache.get(url)
+    if body is None:
+        limiter.wait(url)
+        response = session.get(url, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        body = response.content
+        cache.put(url, body)
+    return body
+
+
+def extract_description(body):
+    soup = BeautifulSoup(body, "html.parser", parse_only=DESCRIPTION_TAGS)
+    # Find <h4>Description</h4> and then next <p>
+    desc_header = soup.find("h4", string="Description")
+    if not desc_header:
+        return "Description header not found"
+    desc_para = desc_header.find_next("p")
+    if not desc_para:
+        return "Description paragraph not found"
+    return desc_para.get_text(strip=True)
+
+
+def scrape_product(product, session, cache, limiter, timeout):
+    try:
+        body = fetch(product["url"], session, cache, limiter, timeout)
+        description = extract_description(body)
+        print(f"Scraped: {product['name']}")
     except Exception as e:
         print(f"Error scraping {product['url']}: {e}")
-        output.append({
-            "name": product["name"],
-            "url": product["url"],
-            "description": "Error retrieving description"
-        })
+        description = "Error retrieving description"
+
+    return {
+        "name": product["name"],
+        "url": product["url"],
+        "description": description,
+    }
+
+
+def load_partial(path):
+    done = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a truncated last line behind.
+                    continue
+                done[entry["url"]] = entry
+    return done
+
+
+def build_ground_truth(products, output, cache_dir, concurrency, interval, timeout):
+    partial_path = f"{output}.partial.jsonl"
+    done = load_partial(partial_path)
+    # Failed entries are retried on the next run rather than kept.
+    done = {url: e for url, e in done.items() if e["description"] != "Error retrieving description"}
+    todo = [p for p in products if p["url"] not in done]
+    print(f"{len(done)} products already scraped, {len(todo)} to go")
+
+    cache = ResponseCache(cache_dir)
+    limiter = HostRateLimiter(interval)
+    write_lock = threading.Lock()
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    def work(product):
+        entry = scrape_product(product, session, cache, limiter, timeout)
+        with write_lock:
+            with open(partial_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            done[entry["url"]] = entry
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(work, todo))
+
+    output_data = [done[p["url"]] for p in products]
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, output)
+    # There is no partial file when every product was already scraped.
+    with suppress(FileNotFoundError):
+        os.remove(partial_path)
+    return output_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape SHL product descriptions for evaluation")
+    parser.add_argument("--products", default="products.json", help="JSON list of {name, url}")
+    parser.add_argument("--output", default="shl_product_descriptions.json")
+    parser.add_argument("--cache-dir", default="http_cache")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--interval", type=float, default=1.0, help="Minimum seconds between requests to one host")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    with open(args.products, "r", encoding="utf-8") as f:
+        products = json.load(f)
 
+    build_ground_truth(
+        products, args.output, args.cache_dir, args.concurrency, args.interval, args.timeout
+    )
+    print(f"Descriptions saved to '{args.output}'")
 
-# Save to JSON
-with open("shl_product_descriptions.json", "w", encoding="utf-8") as f:
-    json.dump(output, f, indent=2, ensure_ascii=False)
 
-print("Descriptions saved to 'shl_product_descriptions.json'")
+if __name__ == "__main__":
+    main()
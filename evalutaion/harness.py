@@ -0,0 +1,215 @@
+"""Evaluate the recommender over a labeled query set.
+
+Each query in the labeled set lists its relevant assessments (``url`` plus an
+optional ``description``). A recommendation counts as a hit when its URL slug
+matches a relevant assessment or its description embedding is within
+``--threshold`` cosine similarity of one. Embeddings are cached on disk keyed by
+the SHA-256 of the text, and recall@k / MAP@k for every query and every k are
+computed from one similarity matrix.
+
+    python harness.py --queries labeled_queries.json --api-url http://localhost:8000
+    python harness.py --queries labeled_queries.json --predictions predictions.jsonl
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+class EmbeddingCache:
+    """Sentence embeddings persisted as ``<dir>/<model>.npz`` keyed by text hash."""
+
+    def __init__(self, cache_dir="embedding_cache", model_name=MODEL_NAME):
+        self.model_name = model_name
+        self.path = os.path.join(cache_dir, f"{model_name.replace('/', '_')}.npz")
+        self._model = None
+        self._index = {}
+        self._matrix = None
+        if os.path.exists(self.path):
+            data = np.load(self.path)
+            self._matrix = data["embeddings"]
+            self._index = {h: i for i, h in enumerate(data["hashes"].tolist())}
+
+    @staticmethod
+    def key(text):
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _encoder(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def encode(self, texts):
+        """Return L2-normalized float32 embeddings, encoding only unseen texts."""
+        keys = [self.key(t) for t in texts]
+        missing = list(dict.fromkeys(k for k in keys if k not in self._index))
+        if missing:
+            by_key = dict(zip(keys, texts))
+            fresh = self._encoder().encode(
+                [by_key[k] for k in missing],
+                batch_size=64,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            ).astype(np.float32)
+            start = 0 if self._matrix is None else len(self._matrix)
+            self._matrix = fresh if self._matrix is None else np.vstack([self._matrix, fresh])
+            self._index.update({k: start + i for i, k in enumerate(missing)})
+            self.save()
+        if not keys:
+            return np.zeros((0, 0 if self._matrix is None else self._matrix.shape[1]), np.float32)
+        return self._matrix[[self._index[k] for k in keys]]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        hashes = sorted(self._index, key=self._index.get)
+        tmp_path = f"{self.path}.tmp.npz"
+        np.savez(tmp_path, hashes=np.array(hashes), embeddings=self._matrix)
+        os.replace(tmp_path, self.path)
+
+
+def slug(url):
+    return url.rstrip("/").split("/")[-1] if url else ""
+
+
+def collect_predictions(queries, api_url=None, predictions_path=None):
+    """Return ``{query: {"recommendations": [...], "latency": seconds}}``.
+
+    Live runs append to ``predictions_path`` as they go so a rerun can score
+    the same responses without calling the API again.
+    """
+    predictions = {}
+    if predictions_path and os.path.exists(predictions_path):
+        with open(predictions_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    predictions[entry["query"]] = entry
+
+    if api_url:
+        import requests
+
+        session = requests.Session()
+        for item in queries:
+            if item["query"] in predictions:
+                continue
+            start = time.perf_counter()
+            response = session.post(f"{api_url}/recommend", json={"query": item["query"]}, timeout=600)
+            latency = time.perf_counter() - start
+            response.raise_for_status()
+            recommendations = response.json()["recommendations"].get("recommended_assessments", [])
+            entry = {"query": item["query"], "recommendations": recommendations, "latency": latency}
+            predictions[item["query"]] = entry
+            if predictions_path:
+                with open(predictions_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    return predictions
+
+
+def evaluate(queries, predictions, cache, ks=(1, 3, 5, 10), threshold=0.8):
+    """Score every query at every ``k`` from a single prediction x truth similarity matrix."""
+    max_k = max(ks)
+    pred_query, pred_rank, pred_text, pred_slug = [], [], [], []
+    true_query, true_text, true_slug = [], [], []
+
+    for q, item in enumerate(queries):
+        recs = predictions.get(item["query"], {}).get("recommendations", [])[:max_k]
+        for rank, rec in enumerate(recs):
+            pred_query.append(q)
+            pred_rank.append(rank)
+            pred_text.append(rec.get("description", ""))
+            pred_slug.append(slug(rec.get("url")))
+        for rel in item["relevant"]:
+            rel = rel if isinstance(rel, dict) else {"url": rel}
+            true_query.append(q)
+            true_text.append(rel.get("description", ""))
+            true_slug.append(slug(rel.get("url")))
+
+    num_queries = len(queries)
+    pred_query, pred_rank = np.array(pred_query, int), np.array(pred_rank, int)
+    true_query = np.array(true_query, int)
+
+    match = (pred_query[:, None] == true_query[None, :]) & (
+        np.array(pred_slug, object)[:, None] == np.array(true_slug, object)[None, :]
+    )
+    has_text = np.array([bool(t) for t in true_text])
+    if len(pred_text) and has_text.any():
+        sims = cache.encode(pred_text) @ cache.encode(true_text).T
+        match |= (pred_query[:, None] == true_query[None, :]) & (sims >= threshold) & has_text[None, :]
+
+    # Rank at which each relevant item is first retrieved; a prediction only
+    # counts as relevant if it is that first hit for some relevant item.
+    first_hit = np.where(match, pred_rank[:, None], max_k).min(axis=0, initial=max_k)
+    first_hitter = match & (pred_rank[:, None] == first_hit[None, :])
+    relevant = np.zeros((num_queries, max_k), bool)
+    hit_rows = first_hitter.any(axis=1)
+    relevant[pred_query[hit_rows], pred_rank[hit_rows]] = True
+
+    num_relevant = np.bincount(true_query, minlength=num_queries)
+    precision_at = np.cumsum(relevant, axis=1) / np.arange(1, max_k + 1)
+
+    results = {}
+    for k in ks:
+        found = np.bincount(true_query, weights=first_hit < k, minlength=num_queries)
+        recall = np.divide(found, num_relevant, out=np.zeros(num_queries), where=num_relevant > 0)
+        denom = np.minimum(num_relevant, k)
+        ap = np.divide(
+            (precision_at[:, :k] * relevant[:, :k]).sum(axis=1),
+            denom,
+            out=np.zeros(num_queries),
+            where=denom > 0,
+        )
+        results[k] = {"recall": recall, "ap": ap}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall@k / MAP@k over a labeled query set")
+    parser.add_argument("--queries", default="labeled_queries.json")
+    parser.add_argument("--api-url", default=os.environ.get("API_URL"))
+    parser.add_argument("--predictions", default="predictions.jsonl")
+    parser.add_argument("--cache-dir", default="embedding_cache")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--report", default="evaluation_report.json")
+    args = parser.parse_args()
+
+    with open(args.queries, "r", encoding="utf-8") as f:
+        queries = json.load(f)
+
+    predictions = collect_predictions(queries, args.api_url, args.predictions)
+    results = evaluate(queries, predictions, EmbeddingCache(args.cache_dir), args.k, args.threshold)
+    latencies = np.array([predictions.get(q["query"], {}).get("latency", np.nan) for q in queries])
+
+    for k in args.k:
+        print(f"Recall@{k}: {results[k]['recall'].mean():.4f}  MAP@{k}: {results[k]['ap'].mean():.4f}")
+    if not np.isnan(latencies).all():
+        print(
+            f"Latency p50: {np.nanpercentile(latencies, 50):.2f}s  "
+            f"p95: {np.nanpercentile(latencies, 95):.2f}s"
+        )
+
+    report = [
+        {
+            "query": item["query"],
+            "latency": None if np.isnan(latencies[q]) else float(latencies[q]),
+            **{f"recall@{k}": float(results[k]["recall"][q]) for k in args.k},
+            **{f"ap@{k}": float(results[k]["ap"][q]) for k in args.k},
+        }
+        for q, item in enumerate(queries)
+    ]
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Per-query results saved to '{args.report}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""Replay recorded /recommend traffic against this build and compare with the recording.
+
+Recordings are captured by the API when ``TRAFFIC_CAPTURE_RATE`` is set. Each
+one is run through the pipeline in-process, starting from empty caches, with
+shl.com and Gemini answered from the recorded responses -- after the recorded
+latency unless ``--no-latency`` is given. The report compares the time spent
+in each pipeline stage with the recorded baseline and the overlap of the
+top-k recommendations (Jaccard@k), and counts upstream calls the recording
+has no answer for (searches or details the baseline never made).
+
+    python -m evalutaion.replay captures/
+    python -m evalutaion.replay captures/traffic-20261019-4242.jsonl --no-latency --output replay.jsonl
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import numpy as np
+
+# Replays run on their own cache so they neither read nor pollute the API's; it is
+# cleared before every recording, so it must never be one the API also uses.
+REPLAY_CACHE_PATH = os.path.join(tempfile.mkdtemp(prefix="replay-"), "cache.sqlite3")
+os.environ["SHARED_CACHE_PATH"] = REPLAY_CACHE_PATH
+
+from api import gemini_integeration, gemini_recommender, shl_scraper  # noqa: E402
+from api.prompt_cache import RecordingBackend  # noqa: E402
+from api.shared_cache import shared_cache  # noqa: E402
+from api.traffic_capture import load_recordings  # noqa: E402
+
+STAGES = ("filters", "candidates", "recommendations")
+EMPTY_RANKING = '{"recommended_assessments": []}'
+
+
+class ReplayUpstream:
+    """shl.com and Gemini answering from one recording."""
+
+    def __init__(self, recording, latency=True):
+        self.recording = recording
+        self.latency = latency
+        self.misses = []
+        self._parses = list(recording["llm"]["parse"])
+        self._rankings = list(recording["llm"]["ranking"])
+
+    def _answer(self, entry):
+        if self.latency:
+            time.sleep(entry["seconds"])
+        return entry["response"]
+
+    def fetch_listing(self, url, *args, **kwargs):
+        entry = self.recording["searches"].get(url)
+        if entry is None:
+            self.misses.append(url)
+            return []
+        return self._answer(entry)
+
+    def fetch_details(self, url):
+        entry = self.recording["details"].get(url)
+        if entry is None:
+            self.misses.append(url)
+            return {}
+        return self._answer(entry)
+
+    def parse(self):
+        return SimpleNamespace(text=self._answer(self._parses.pop(0)))
+
+    def rank(self):
+        # A build that ranks more often than the baseline gets the last answer again.
+        if not self._rankings:
+            self.misses.append("gemini:ranking")
+            return EMPTY_RANKING
+        entry = self._rankings.pop(0) if len(self._rankings) > 1 else self._rankings[0]
+        return self._answer(entry)
+
+
+class ReplayParser(gemini_integeration.GeminiQueryParser):
+    """The query parser with the recorded model output in place of Gemini.
+
+    When the baseline served the filters from its cache there is no model
+    output to parse, and the recorded filters are returned as they are.
+    """
+
+    def __init__(self, upstream):
+        self.upstream = upstream
+        self.model = SimpleNamespace(generate_content=lambda prompt: upstream.parse())
+
+    def parse_query(self, query):
+        if not self.upstream.recording["llm"]["parse"]:
+            return dict(self.upstream.recording["filters"] or {})
+        return super().parse_query(query)
+
+
+class ReplayRankingBackend(RecordingBackend):
+    def __init__(self, upstream):
+        super().__init__()
+        self.upstream = upstream
+
+    def generate(self, handle, prompt):
+        super().generate(handle, prompt)
+        return self.upstream.rank()
+
+    def generate_plain(self, prompt):
+        super().generate_plain(prompt)
+        return self.upstream.rank()
+
+
+@contextmanager
+def stand_ins(upstream):
+    """Route the pipeline's upstream calls to ``upstream`` for the enclosed block."""
+    saved = (
+        shl_scraper._fetch_listing,
+        shl_scraper._fetch_assessment_details,
+        gemini_integeration.get_parser,
+        gemini_recommender.ranking_backend,
+    )
+    parser = ReplayParser(upstream)
+    shl_scraper._fetch_listing = upstream.fetch_listing
+    shl_scraper._fetch_assessment_details = upstream.fetch_details
+    gemini_integeration.get_parser = lambda: parser
+    gemini_recommender.set_ranking_backend(ReplayRankingBackend(upstream))
+    try:
+        yield
+    finally:
+        (
+            shl_scraper._fetch_listing,
+            shl_scraper._fetch_assessment_details,
+            gemini_integeration.get_parser,
+            ranking_backend,
+        ) = saved
+        gemini_recommender.set_ranking_backend(ranking_backend)
+
+
+def stage_seconds(stages):
+    """Seconds spent in each stage, from cumulative ``{stage: seconds since start}``."""
+    seconds, previous = {}, 0.0
+    for stage in STAGES:
+        if stage in stages:
+            seconds[stage] = stages[stage] - previous
+            previous = stages[stage]
+    seconds["total"] = previous
+    return seconds
+
+
+def result_urls(results, k):
+    if not isinstance(results, dict):
+        return []
+    return [r.get("url") for r in results.get("recommended_assessments", [])[:k]]
+
+
+def jaccard(a, b):
+    a, b = set(a), set(b)
+    return 1.0 if not a and not b else len(a & b) / len(a | b)
+
+
+def replay(recording, latency=True, k=10):
+    """Run one recording through this build; returns its comparison entry."""
+    from api.app import iter_recommendation
+
+    if shared_cache.path != REPLAY_CACHE_PATH:
+        # The cache was opened before this module set its path, e.g. by an API import.
+        raise RuntimeError(f"Refusing to clear shared cache at {shared_cache.path}")
+    shared_cache.clear()
+    upstream = ReplayUpstream(recording, latency)
+    stages, body = {}, {}
+    with stand_ins(upstream):
+        start = time.perf_counter()
+        for stage, payload in iter_recommendation(
+            recording["query"], recording["k"], recording["fields"]
+        ):
+            stages[stage] = time.perf_counter() - start
+            if stage == "recommendations":
+                body = payload
+
+    baseline_urls = result_urls(recording["results"], k)
+    replay_urls = result_urls(body.get("recommendations"), k)
+    return {
+        "id": recording["id"],
+        "baseline": stage_seconds(recording["stages"]),
+        "replay": stage_seconds(stages),
+        f"jaccard@{k}": jaccard(baseline_urls, replay_urls),
+        "identical": baseline_urls == replay_urls,
+        "misses": upstream.misses,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded traffic against this build")
+    parser.add_argument("captures", nargs="+", help="capture files or directories")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--no-latency", action="store_true", help="answer upstream calls at once")
+    parser.add_argument("--output", help="write one comparison per recording as JSON Lines")
+    args = parser.parse_args()
+
+    recordings = load_recordings(args.captures)
+    entries = [replay(r, latency=not args.no_latency, k=args.k) for r in recordings]
+    if not entries:
+        print("No recordings found")
+        return
+
+    print(f"Replayed {len(entries)} recordings")
+    print(f"{'stage':<16}" + f"{'baseline':>14}{'replay':>12}{'delta':>10}" * 2 + "   (p50, p90)")
+    for stage in (*STAGES, "total"):
+        baseline = np.array([e["baseline"].get(stage, np.nan) for e in entries])
+        replayed = np.array([e["replay"].get(stage, np.nan) for e in entries])
+        if np.isnan(baseline).all() or np.isnan(replayed).all():
+            continue
+        row = f"{stage:<16}"
+        for q in (50, 90):
+            b, r = np.nanpercentile(baseline, q), np.nanpercentile(replayed, q)
+            row += f"{b:13.3f}s{r:11.3f}s{r - b:+9.3f}s"
+        print(row)
+
+    scores = np.array([e[f"jaccard@{args.k}"] for e in entries])
+    print(
+        f"Jaccard@{args.k}: mean {scores.mean():.3f}  min {scores.min():.3f}  "
+        f"identical top-{args.k}: {sum(e['identical'] for e in entries)}/{len(entries)}"
+    )
+    missing = sum(len(e["misses"]) for e in entries)
+    if missing:
+        print(
+            f"Upstream calls with no recorded answer: {missing} "
+            f"in {sum(bool(e['misses']) for e in entries)} recordings"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        print(f"Per-recording comparison saved to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import json
+import os
+import re
+import tempfile
+
+# The API opens its shared cache at import; keep the test's apart from any real one.
+os.environ["SHARED_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+os.environ["CACHE_WARMING"] = "0"
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from api import app as api_app  # noqa: E402
+from api import gemini_integeration, gemini_recommender, shl_scraper, traffic_capture  # noqa: E402
+from api.prompt_cache import RecordingBackend  # noqa: E402
+from api.response_cache import recommendation_cache, recommendation_key  # noqa: E402
+
+QUERY = "Java developer, mail me at jane@example.org"
+LISTING = (
+    '<div class="custom__table-responsive"><table><tr><th>Name</th></tr>'
+    '<tr><td><a href="/products/product-catalog/view/java-8-new/">Java 8</a></td>'
+    "<td></td><td></td><td></td></tr></table></div>"
+)
+DETAILS = (
+    '<div class="product-catalogue-training-calendar__row"><h4>Description</h4>'
+    "<p>Java knowledge test</p></div>"
+    '<span class="product-catalogue__key">K</span>'
+)
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+        self.content = text.encode("utf-8")
+
+    def raise_for_status(self):
+        pass
+
+
+class Session:
+    def get(self, url, **kwargs):
+        return Response(LISTING if "keyword=" in url else DETAILS)
+
+
+class Model:
+    def generate_content(self, prompt):
+        text = "Job Family: Information Technology\nKeywords: Java\nNotes: contact jane@example.org"
+        return type("GenerateContentResponse", (), {"text": text})()
+
+
+class RankingBackend(RecordingBackend):
+    def generate(self, handle, prompt):
+        return self.generate_plain(prompt)
+
+    def generate_plain(self, prompt):
+        urls = sorted(set(re.findall(r"https://www\.shl\.com/products/product-catalog/view/[\w-]+/", prompt)))
+        return json.dumps(
+            {
+                "recommended_assessments": [
+                    {
+                        "url": url,
+                        "adaptive_support": "No",
+                        "description": "Java knowledge test",
+                        "duration": 10,
+                        "remote_support": "Yes",
+                        "test_type": ["K"],
+                    }
+                    for url in urls
+                ]
+            }
+        )
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    parser = gemini_integeration.GeminiQueryParser.__new__(gemini_integeration.GeminiQueryParser)
+    parser.model = Model()
+    monkeypatch.setattr(shl_scraper, "get_session", lambda: Session())
+    monkeypatch.setattr(gemini_integeration, "get_parser", lambda: parser)
+    monkeypatch.setattr(api_app, "warm_up", lambda: {})
+    monkeypatch.setattr(api_app, "run_refresher", lambda: api_app.asyncio.sleep(0))
+    monkeypatch.setattr(api_app, "write_file_atomic", lambda path, text: None)
+    monkeypatch.setattr(gemini_recommender, "write_file_atomic", lambda path, text: None)
+    monkeypatch.setattr(traffic_capture, "TRAFFIC_CAPTURE_RATE", 1.0)
+    monkeypatch.setattr(traffic_capture, "TRAFFIC_CAPTURE_DIR", str(tmp_path))
+    backend = gemini_recommender.ranking_backend
+    gemini_recommender.set_ranking_backend(RankingBackend())
+    try:
+        with TestClient(api_app.app) as client:
+            yield client
+    finally:
+        gemini_recommender.set_ranking_backend(backend)
+
+
+def test_streamed_request_is_captured_and_cached(client, tmp_path):
+    response = client.post("/recommend/stream", json={"query": QUERY})
+    events = [json.loads(line) for line in response.text.splitlines()]
+
+    assert [event["stage"] for event in events] == ["filters", "candidates", "recommendations"]
+
+    recordings = traffic_capture.load_recordings([str(tmp_path)])
+    assert len(recordings) == 1
+    recording = recordings[0]
+    assert "jane@example.org" not in json.dumps(recording)
+    assert recording["searches"] and recording["details"]
+    assert len(recording["llm"]["parse"]) == 1 and len(recording["llm"]["ranking"]) == 1
+    assert set(recording["stages"]) == {"filters", "candidates", "recommendations"}
+
+    key = recommendation_key(QUERY, 10, None, api_app.get_snapshot().version)
+    assert recommendation_cache.get(key) == events[-1]["data"]